@@ -329,7 +329,7 @@ class CChan:
                 segseg.next = None
 
         with open(file_path, "wb") as f:
-            pickle.dump(self, f)
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
 
         sys.setrecursionlimit(_pre_limit)
 
@@ -42,3 +42,9 @@ class CTime:
 
     def __ge__(self, t2):
         return self.ts >= t2.ts
+
+    def __lt__(self, t2):
+        return self.ts < t2.ts
+
+    def __le__(self, t2):
+        return self.ts <= t2.ts
@@ -1,6 +1,30 @@
+import functools
+import glob
 import inspect
+import json
+import os
+import pickle
+import time
 import types
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(raw: bytes):
+    # 优先使用orjson（C实现，解析/序列化明显快于标准库json），未安装时回退到json
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 
 class make_cache:
     def __init__(self, func):
@@ -32,3 +56,114 @@ class make_cache:
         result = self.func(*args, **kwargs)
         cache[self.func_key] = result
         return result
+
+
+def disk_memoize(path, ttl_seconds):
+    """
+    将无参函数的返回值pickle到磁盘，缓存文件修改时间距今不超过ttl_seconds时直接读取缓存
+    同一进程内再加一层内存缓存，有效期内重复调用不再读盘
+    返回值为空（如接口失败时返回的空字典）时不写入缓存；被装饰函数提供cache_clear()清空内存和磁盘缓存
+    """
+    def decorator(func):
+        memo = {}  # "result" -> 返回值, "expire" -> 过期时间戳
+
+        @functools.wraps(func)
+        def wrapper():
+            now = time.time()
+            if "result" in memo and now < memo["expire"]:
+                return memo["result"]
+
+            try:
+                mtime = os.stat(path).st_mtime
+                if now - mtime < ttl_seconds:
+                    with open(path, "rb") as f:
+                        result = pickle.load(f)
+                    memo.update(result=result, expire=mtime + ttl_seconds)
+                    return result
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass  # 缓存不存在或已损坏，重新计算
+
+            result = func()
+            if result:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+                memo.update(result=result, expire=now + ttl_seconds)
+            return result
+
+        def cache_clear():
+            memo.clear()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+def load_yaml_cached(path):
+    """
+    读取YAML配置，解析结果以JSON缓存在同目录的 .<文件名>.<mtime_ns>.json 中
+    YAML文件未修改时直接读取JSON缓存（json解析远快于yaml.safe_load），修改后自动重新解析并清理旧缓存
+    内容无法无损转为JSON（如含日期、非字符串键）时不写缓存
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    dir_name, base_name = os.path.split(path)
+    cache_prefix = os.path.join(dir_name, f".{base_name}.")
+    cache_path = f"{cache_prefix}{mtime_ns}.json"
+    try:
+        with open(cache_path, "rb") as f:
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        pass  # 缓存不存在或已损坏，重新解析
+
+    import yaml
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+
+    try:
+        raw = _json_dumps(data)
+    except (TypeError, ValueError):
+        return data
+    if _json_loads(raw) != data:
+        return data
+
+    for stale_path in glob.glob(f"{glob.escape(cache_prefix)}*.json"):
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_path, cache_path)
+    return data
+
+
+def load_json_cache(path, signature):
+    """
+    读取save_json_cache写出的JSON缓存，signature与写入时一致才返回数据，否则（含文件不存在、损坏）返回None
+    """
+    try:
+        with open(path, "rb") as f:
+            cached = _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("signature") != signature:
+        return None
+    return cached.get("data")
+
+
+def save_json_cache(path, signature, data):
+    """
+    将data连同signature原子写入JSON缓存文件，signature需为可JSON序列化的值（如mtime、文件列表）
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_json_dumps({"signature": signature, "data": data}))
+    os.replace(tmp_path, path)
@@ -96,6 +96,18 @@ class CBaoStock(CCommonStockApi):
         self.name = code_name
         self.is_stock = (stock_type == '1')
 
+    @classmethod
+    def query_all_stock_names(cls):
+        # 一次请求获取全部证券的 代码->名称，代替逐个代码调用SetBasciInfo
+        rs = bs.query_stock_basic()
+        if rs.error_code != '0':
+            raise Exception(rs.error_msg)
+        names = {}
+        while rs.next():
+            row = rs.get_row_data()
+            names[row[0]] = row[1]
+        return names
+
     @classmethod
     def do_init(cls):
         if not cls.is_connect:
@@ -7,7 +7,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from Common.CEnum import KL_TYPE, AUTYPE
 from KLine.KLine_Unit import CKLine_Unit
-from OfflineData.offline_data_util import OfflineDataUtil
+from OfflineData.offline_data_util import get_offline_data_util
 from .CommonStockAPI import CCommonStockApi
 
 
@@ -29,7 +29,7 @@ class CStockFileReader(CCommonStockApi):
             autype (AUTYPE, optional): 复权类型。默认为 AUTYPE.QFQ。
         """
         super().__init__(code, k_type, begin_date, end_date, autype)
-        self.util = OfflineDataUtil()
+        self.util = get_offline_data_util()
 
     def get_kl_data(self) -> Iterable[CKLine_Unit]:
         """
@@ -41,10 +41,10 @@ class CStockFileReader(CCommonStockApi):
         Yields:
             CKLine_Unit: 代表单根K线数据的对象。
         """
-        # 优先使用速度更快的Pickle格式，如果不存在则回退到CSV
+        # 优先使用速度更快的Pickle格式，如果不存在则回退到逐行读取CSV
         kline_data = self.util.load_kline_data_pickle(self.code, self.k_type, self.autype)
         if not kline_data:
-            kline_data = self.util.load_kline_data_csv(self.code, self.k_type, self.autype)
+            kline_data = self.util.iter_kline_data_csv(self.code, self.k_type, self.autype)
 
         for kline in kline_data:
             # 确保时间可以与begin_date/end_date字符串进行比较
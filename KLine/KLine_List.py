@@ -1,3 +1,4 @@
+import bisect
 import copy
 from typing import List, Union, overload
 
@@ -7,6 +8,7 @@ from BuySellPoint.BSPointList import CBSPointList
 from ChanConfig import CChanConfig
 from Common.CEnum import KLINE_DIR, SEG_TYPE
 from Common.ChanException import CChanException, ErrCode
+from Common.CTime import CTime
 from Seg.Seg import CSeg
 from Seg.SegConfig import CSegConfig
 from Seg.SegListComm import CSegListComm
@@ -54,6 +56,8 @@ class CKLine_List:
         self.last_sure_seg_start_bi_idx = -1
         self.last_sure_segseg_start_bi_idx = -1
 
+        self._time_begin_ts: List[float] = []  # lst中各合并K线time_begin的时间戳，按需增量维护
+
     def __deepcopy__(self, memo):
         new_obj = CKLine_List(self.kl_type, self.config)
         memo[id(self)] = new_obj
@@ -134,6 +138,16 @@ class CKLine_List:
             elif self.step_calculation and self.bi_list.try_add_virtual_bi(self.lst[-1], need_del_end=True):  # 这里的必要性参见issue#175
                 self.cal_seg_and_zs()
 
+    def get_klc_index_by_time(self, t: CTime) -> int:
+        """
+        二分查找第一根time_begin不早于t的合并K线下标，全部早于t时返回len(self.lst)
+        """
+        ts_lst = self._time_begin_ts
+        if len(ts_lst) > len(self.lst):
+            ts_lst.clear()
+        ts_lst.extend(klc.time_begin.ts for klc in self.lst[len(ts_lst):])
+        return bisect.bisect_left(ts_lst, t.ts)
+
     def klu_iter(self, klc_begin_idx=0):
         for klc in self.lst[klc_begin_idx:]:
             yield from klc.lst
@@ -4,7 +4,7 @@
 __version__ = "1.0.0"
 __author__ = "chan.py"
 
-from .offline_data_util import OfflineDataUtil
+from .offline_data_util import OfflineDataUtil, get_offline_data_util
 from .bao_download import BaoStockDownloader
 from .bao_update import BaoStockUpdater
 from .reits_download import AkshareReitsDownloader
@@ -12,6 +12,7 @@ from .reits_update import AkshareReitsUpdater
 
 __all__ = [
     'OfflineDataUtil',
+    'get_offline_data_util',
     'BaoStockDownloader', 
     'BaoStockUpdater',
     'AkshareReitsDownloader',
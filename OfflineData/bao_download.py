@@ -21,7 +21,7 @@ from Common.CTime import CTime
 from Common.func_util import str2float
 from KLine.KLine_Unit import CKLine_Unit
 from DataAPI.BaoStockAPI import CBaoStock, create_item_dict, GetColumnNameFromFieldList
-from OfflineData.offline_data_util import OfflineDataUtil
+from OfflineData.offline_data_util import get_offline_data_util
 
 
 class BaoStockDownloader:
@@ -34,7 +34,7 @@ class BaoStockDownloader:
         Args:
             config_path: 配置文件路径
         """
-        self.util = OfflineDataUtil(config_path)
+        self.util = get_offline_data_util(config_path)
         self.logger = self.util.logger
         self.is_connected = False
         
@@ -21,7 +21,7 @@ import pandas as pd
 from Common.CEnum import AUTYPE, DATA_FIELD, KL_TYPE
 from Common.CTime import CTime
 from KLine.KLine_Unit import CKLine_Unit
-from OfflineData.offline_data_util import OfflineDataUtil
+from OfflineData.offline_data_util import get_offline_data_util
 
 
 def normalize_symbol_candidates(code: str) -> List[str]:
@@ -48,7 +48,7 @@ class AkshareBondDownloader:
     """Akshare 债券数据下载器（全量）"""
 
     def __init__(self, config_path: Optional[str] = None):
-        self.util = OfflineDataUtil(config_path)
+        self.util = get_offline_data_util(config_path)
         self.logger = self.util.logger
 
         self.default_start_date = "2000-01-01"
@@ -4,12 +4,14 @@
 """
 
 import os
+import re
 import sys
+import functools
 import sqlite3
 import pickle
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
 # 添加项目根目录到路径
@@ -20,6 +22,32 @@ from Common.CTime import CTime
 from Common.func_util import str2float
 from KLine.KLine_Unit import CKLine_Unit
 
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+    # 表头单独写出且不加引号，保持与纯Python写出的CSV格式一致（时间字段不含逗号）
+    _ARROW_CSV_OPTIONS = pa_csv.WriteOptions(include_header=False, quoting_style='none')
+except (ImportError, TypeError):  # 未安装pyarrow，或版本过低不支持quoting_style
+    pa = None
+
+CSV_HEADERS = ['time', 'open', 'high', 'low', 'close', 'volume', 'turnover', 'turnrate']
+
+# 按文件名识别品种的正则，匹配结果的第1组为代码
+DOWNLOADED_CODE_PATTERNS = {
+    # 股票代码通常包含交易所前缀，如 "sz.000001" 或 "sh.600000"
+    'stock': re.compile(r'^([^.]+\..+)\.csv$'),
+    # 国债代码通常为 6 位纯数字且以 "01" 开头，例如 019547
+    'bond': re.compile(r'^(01\d{4})\.csv$'),
+    # REITs（粗略分类）：6 位纯数字但不以 "01" 开头，避免与国债混淆
+    'reits': re.compile(r'^((?!01)\d{6})\.csv$'),
+}
+
 
 # Monkey patch CTime.to_str to support 'fmt' argument
 if not hasattr(CTime, '_to_str_original'):
@@ -37,6 +65,89 @@ if not hasattr(CTime, '_to_str_original'):
     CTime.to_str = to_str_patched
 
 
+def _parse_csv_time(time_str: str) -> CTime:
+    """解析CSV中的时间字段，支持 YYYY/MM/DD、YYYY-MM-DD 及 YYYY/MM/DD HH:MM"""
+    time_str = time_str.replace('/', '-')  # 规范化为 YYYY-MM-DD
+    if len(time_str) == 10:
+        year, month, day = map(int, time_str.split('-'))
+        return CTime(year, month, day, 0, 0)
+    if len(time_str) == 16:
+        year, month, day = map(int, time_str[:10].split('-'))
+        hour, minute = map(int, time_str[11:].split(':'))
+        return CTime(year, month, day, hour, minute)
+    raise ValueError(f"未知的时间格式: {time_str}")
+
+
+def _kline_units_to_columns(kline_data: List[CKLine_Unit]) -> Dict[str, list]:
+    """将K线数据列表转为按CSV_HEADERS排列的列数据"""
+    columns = {header: [] for header in CSV_HEADERS}
+    for kl_unit in kline_data:
+        # 从trade_info中获取成交量等信息
+        metric = kl_unit.trade_info.metric
+        columns['time'].append(kl_unit.time.to_str())
+        columns['open'].append(kl_unit.open)
+        columns['high'].append(kl_unit.high)
+        columns['low'].append(kl_unit.low)
+        columns['close'].append(kl_unit.close)
+        columns['volume'].append(metric.get(DATA_FIELD.FIELD_VOLUME, 0) or 0)
+        columns['turnover'].append(metric.get(DATA_FIELD.FIELD_TURNOVER, 0) or 0)
+        columns['turnrate'].append(metric.get(DATA_FIELD.FIELD_TURNRATE, 0) or 0)
+    return columns
+
+
+def _columns_to_arrow_table(columns: Dict[str, Sequence], int_headers: Sequence[str] = ()):
+    """
+    将列数据转为pyarrow表，时间列为字符串，其余为float64
+    int_headers中的列若全部为整数值则转为int64
+    """
+    arrays = {}
+    for header in CSV_HEADERS:
+        array = pa.array(columns[header], type=pa.string() if header == 'time' else pa.float64())
+        if header in int_headers:
+            try:
+                # 安全转换，含小数、NaN或超出int64范围时抛出异常，保留float64
+                array = array.cast(pa.int64())
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                pass
+        arrays[header] = array
+    return pa.table(arrays)
+
+
+class CKLineColumns(Sequence):
+    """
+    按列保存的K线数据
+    只在按下标访问时构造对应的CKLine_Unit，遍历全部数据前不产生逐根K线的对象开销
+    """
+
+    def __init__(self, columns: Dict[str, list]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns[CSV_HEADERS[0]])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._build_kline(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("K线下标越界")
+        return self._build_kline(index)
+
+    def _build_kline(self, i: int) -> CKLine_Unit:
+        columns = self.columns
+        return CKLine_Unit({
+            DATA_FIELD.FIELD_TIME: _parse_csv_time(columns['time'][i]),
+            DATA_FIELD.FIELD_OPEN: columns['open'][i],
+            DATA_FIELD.FIELD_HIGH: columns['high'][i],
+            DATA_FIELD.FIELD_LOW: columns['low'][i],
+            DATA_FIELD.FIELD_CLOSE: columns['close'][i],
+            DATA_FIELD.FIELD_VOLUME: columns['volume'][i],
+            DATA_FIELD.FIELD_TURNOVER: columns['turnover'][i],
+            DATA_FIELD.FIELD_TURNRATE: columns['turnrate'][i],
+        })
+
+
 class OfflineDataUtil:
     """离线数据管理通用工具类"""
     
@@ -51,7 +162,11 @@ class OfflineDataUtil:
         self.config = self._load_config()
         self.logger = self._setup_logger()
 
-    def _get_default_config_path(self) -> str:
+        # get_downloaded_stocks结果缓存: (复权类型, 品种) -> (各K线级别目录的mtime签名, 代码列表)
+        self._downloaded_codes_cache: Dict[Tuple[AUTYPE, str], Tuple[tuple, List[str]]] = {}
+
+    @staticmethod
+    def _get_default_config_path() -> str:
         """获取默认配置文件路径"""
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         return os.path.join(project_root, "Config", "config.yaml")
@@ -171,23 +286,51 @@ class OfflineDataUtil:
             code: 股票代码
             k_type: K线类型
             autype: 复权类型
-            data_format: 数据格式 (csv, pickle, sqlite)
+            data_format: 数据格式 (csv, pickle, parquet, sqlite)
             
         Returns:
             文件路径
         """
-        offline_path = self.get_offline_data_path()
-        
         # 根据K线类型和复权类型创建子目录
-        k_type_name = k_type.name.lower().replace('k_', '')
-        autype_name = autype.name.lower()
-        _dir = os.path.join(offline_path, autype_name, k_type_name)
+        _dir = self._get_data_dir(k_type, autype)
         os.makedirs(_dir, exist_ok=True)
         
         filename = f"{code}.{data_format}"
-        
+
         return os.path.join(_dir, filename)
-    
+
+    def _get_data_dir(self, k_type: KL_TYPE, autype: AUTYPE) -> str:
+        """获取K线类型和复权类型对应的数据目录（不创建目录）"""
+        offline_path = self.config.get('offline_data', {}).get('path', './data/offline')
+        k_type_name = k_type.name.lower().replace('k_', '')
+        autype_name = autype.name.lower()
+        return os.path.join(offline_path, autype_name, k_type_name)
+
+    def scan_data_files(self, k_type: KL_TYPE, autype: AUTYPE, data_format: str = 'csv') -> Dict[str, int]:
+        """
+        一次性扫描指定K线类型和复权类型目录下的数据文件
+
+        Args:
+            k_type: K线类型
+            autype: 复权类型
+            data_format: 数据格式 (csv, pickle, parquet)
+
+        Returns:
+            {代码: 文件大小} 字典，目录不存在时返回空字典
+        """
+        # 只读扫描，不创建目录，避免为后续会被跳过的K线类型留下空目录
+        _dir = self._get_data_dir(k_type, autype)
+        if not os.path.isdir(_dir):
+            return {}
+        suffix = f".{data_format}"
+
+        files = {}
+        with os.scandir(_dir) as it:
+            for entry in it:
+                if entry.name.endswith(suffix) and entry.is_file():
+                    files[entry.name[:-len(suffix)]] = entry.stat().st_size
+        return files
+
     def save_kline_data_csv(self, code: str, k_type: KL_TYPE, autype: AUTYPE, kline_data: List[CKLine_Unit]) -> str:
         """
         保存K线数据为CSV格式
@@ -202,34 +345,53 @@ class OfflineDataUtil:
             保存的文件路径
         """
         file_path = self.create_data_file_path(code, k_type, autype, 'csv')
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            # 写入表头
-            headers = ['time', 'open', 'high', 'low', 'close', 'volume', 'turnover', 'turnrate']
-            f.write(','.join(headers) + '\n')
-            
-            # 写入数据
-            for kl_unit in kline_data:
-                # 从trade_info中获取成交量等信息
-                volume = kl_unit.trade_info.metric.get(DATA_FIELD.FIELD_VOLUME, 0)
-                turnover = kl_unit.trade_info.metric.get(DATA_FIELD.FIELD_TURNOVER, 0)
-                turnrate = kl_unit.trade_info.metric.get(DATA_FIELD.FIELD_TURNRATE, 0)
-                
-                row_data = [
-                    kl_unit.time.to_str(),
-                    str(kl_unit.open),
-                    str(kl_unit.high),
-                    str(kl_unit.low),
-                    str(kl_unit.close),
-                    str(volume or 0),
-                    str(turnover or 0),
-                    str(turnrate or 0)
-                ]
-                f.write(','.join(row_data) + '\n')
-        
+        self._write_csv_columns(file_path, _kline_units_to_columns(kline_data))
+
         self.logger.info(f"保存CSV数据: {file_path}, 共{len(kline_data)}条记录")
         return file_path
+
+    def save_kline_columns_csv(self, code: str, k_type: KL_TYPE, autype: AUTYPE, columns: Dict[str, Sequence]) -> str:
+        """
+        直接按列保存K线数据为CSV格式，无需先构造CKLine_Unit列表
+
+        Args:
+            code: 股票代码
+            k_type: K线类型
+            autype: 复权类型
+            columns: 列名 -> 列数据（list、numpy数组或pandas Series），需包含CSV_HEADERS中的全部列，
+                     时间列需为 CTime.to_str() 格式的字符串
+
+        Returns:
+            保存的文件路径
+        """
+        file_path = self.create_data_file_path(code, k_type, autype, 'csv')
+        self._write_csv_columns(file_path, columns)
+
+        self.logger.info(f"保存CSV数据: {file_path}, 共{len(columns[CSV_HEADERS[0]])}条记录")
+        return file_path
     
+    def _write_csv_columns(self, file_path: str, columns: Dict[str, Sequence]):
+        """
+        按列写出CSV文件
+        安装了pyarrow时使用其C++实现写出（写出期间释放GIL，多线程下载时可并行），否则逐行格式化写出
+
+        Args:
+            file_path: 文件路径
+            columns: 列名 -> 列数据，列顺序同CSV_HEADERS
+        """
+        if pa is not None:
+            # pyarrow对较大的浮点数输出科学计数法（如2e+10），成交量、成交额为整数值时按整数写出
+            table = _columns_to_arrow_table(columns, int_headers=('volume', 'turnover'))
+            with pa.OSFile(file_path, 'wb') as f:
+                f.write((','.join(CSV_HEADERS) + '\n').encode('utf-8'))
+                pa_csv.write_csv(table, f, write_options=_ARROW_CSV_OPTIONS)
+            return
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(','.join(CSV_HEADERS) + '\n')
+            for row in zip(*(columns[header] for header in CSV_HEADERS)):
+                f.write(','.join(map(str, row)) + '\n')
+
     def load_kline_data_csv(self, code: str, k_type: KL_TYPE, autype: AUTYPE) -> List[CKLine_Unit]:
         """
         从CSV文件加载K线数据
@@ -248,24 +410,83 @@ class OfflineDataUtil:
             self.logger.warning(f"CSV文件不存在: {file_path}")
             return []
         
+        if pd is not None:
+            kline_data = self._read_kline_csv_columns(file_path)
+        else:
+            kline_data = None
+        if kline_data is None:
+            kline_data = list(self.iter_kline_data_csv(code, k_type, autype))
+        
+        self.logger.info(f"加载CSV数据: {file_path}, 共{len(kline_data)}条记录")
+        return kline_data
+
+    def _read_kline_csv_columns(self, file_path: str) -> Optional[List[CKLine_Unit]]:
+        """
+        使用pandas的C解析器（内存映射读取）一次性解析整个CSV文件，再按列构造K线数据
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            K线数据列表；文件格式异常（缺列、数值列含非法内容等）无法按列解析时返回None
+        """
+        try:
+            df = pd.read_csv(
+                file_path,
+                engine='c',
+                memory_map=True,
+                usecols=CSV_HEADERS,
+                dtype={header: str if header == 'time' else 'float64' for header in CSV_HEADERS},
+                # 默认的快速浮点解析可能与float()相差一个ULP，追加写回时会改动已有数据
+                float_precision='round_trip',
+            )
+        except ValueError:
+            return None
+        # 与逐行解析一致，空值按0处理
+        df = df.fillna({header: 0.0 for header in CSV_HEADERS[1:]})
+
         kline_data = []
+        for row in zip(*(df[header].tolist() for header in CSV_HEADERS)):
+            try:
+                kline_data.append(CKLine_Unit({
+                    DATA_FIELD.FIELD_TIME: _parse_csv_time(row[0]),
+                    DATA_FIELD.FIELD_OPEN: row[1],
+                    DATA_FIELD.FIELD_HIGH: row[2],
+                    DATA_FIELD.FIELD_LOW: row[3],
+                    DATA_FIELD.FIELD_CLOSE: row[4],
+                    DATA_FIELD.FIELD_VOLUME: row[5],
+                    DATA_FIELD.FIELD_TURNOVER: row[6],
+                    DATA_FIELD.FIELD_TURNRATE: row[7],
+                }))
+            except Exception as e:
+                self.logger.warning(f"解析K线数据失败: {','.join(map(str, row))}, 错误: {e}")
+        return kline_data
+
+    def iter_kline_data_csv(self, code: str, k_type: KL_TYPE, autype: AUTYPE) -> Iterator[CKLine_Unit]:
+        """
+        逐行读取CSV文件并按需生成K线数据，不在内存中保留整个列表
+
+        Args:
+            code: 股票代码
+            k_type: K线类型
+            autype: 复权类型
+
+        Yields:
+            CKLine_Unit: 单根K线数据
+        """
+        file_path = self.create_data_file_path(code, k_type, autype, 'csv')
+        if not os.path.exists(file_path):
+            return
+
         with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-            # 跳过表头
-            for line in lines[1:]:
+            next(f, None)  # 跳过表头
+            for line in f:
                 if line.strip():
                     parts = line.strip().split(',')
                     if len(parts) >= 8:
                         try:
                             # 解析时间
-                            time_str = parts[0]
-                            if len(time_str) == 10:  # YYYY-MM-DD or YYYY/MM/DD
-                                time_str = time_str.replace('/', '-')  # 规范化为 YYYY-MM-DD
-                                year, month, day = map(int, time_str.split('-'))
-                                time_obj = CTime(year, month,day, 0, 0)
-                            else:  # 其他格式
-                                time_obj = CTime.from_str(time_str)
+                            time_obj = _parse_csv_time(parts[0])
                             
                             # 创建数据字典
                             item_dict = {
@@ -279,14 +500,66 @@ class OfflineDataUtil:
                                 DATA_FIELD.FIELD_TURNRATE: str2float(parts[7])
                             }
                             
-                            kline_data.append(CKLine_Unit(item_dict))
+                            kline = CKLine_Unit(item_dict)
                         except Exception as e:
                             self.logger.warning(f"解析K线数据失败: {line.strip()}, 错误: {e}")
+                            continue
+                        yield kline
+    
+    def save_kline_data_parquet(self, code: str, k_type: KL_TYPE, autype: AUTYPE, kline_data: List[CKLine_Unit]) -> str:
+        """
+        保存K线数据为Parquet列式格式（需安装pyarrow）
         
-        self.logger.info(f"加载CSV数据: {file_path}, 共{len(kline_data)}条记录")
+        Args:
+            code: 股票代码
+            k_type: K线类型
+            autype: 复权类型
+            kline_data: K线数据列表
+            
+        Returns:
+            保存的文件路径
+        """
+        if pa is None:
+            raise ImportError("保存Parquet数据需要安装pyarrow")
+        file_path = self.create_data_file_path(code, k_type, autype, 'parquet')
+
+        table = _columns_to_arrow_table(_kline_units_to_columns(kline_data))
+        pa_parquet.write_table(table, file_path, compression='zstd')
+
+        self.logger.info(f"保存Parquet数据: {file_path}, 共{len(kline_data)}条记录")
+        return file_path
+
+    def load_kline_data_parquet(self, code: str, k_type: KL_TYPE, autype: AUTYPE) -> Sequence[CKLine_Unit]:
+        """
+        从Parquet文件加载K线数据，按列读入内存，访问单根K线时才构造CKLine_Unit
+        
+        Args:
+            code: 股票代码
+            k_type: K线类型
+            autype: 复权类型
+            
+        Returns:
+            K线数据序列（CKLineColumns），文件不存在或读取失败时返回空列表
+        """
+        if pa is None:
+            raise ImportError("加载Parquet数据需要安装pyarrow")
+        file_path = self.create_data_file_path(code, k_type, autype, 'parquet')
+
+        if not os.path.exists(file_path):
+            self.logger.warning(f"Parquet文件不存在: {file_path}")
+            return []
+
+        try:
+            table = pa_parquet.read_table(file_path, columns=CSV_HEADERS, memory_map=True)
+        except Exception as e:
+            self.logger.error(f"加载Parquet数据失败: {file_path}, 错误: {e}")
+            return []
+
+        kline_data = CKLineColumns({header: table.column(header).to_pylist() for header in CSV_HEADERS})
+        self.logger.info(f"加载Parquet数据: {file_path}, 共{len(kline_data)}条记录")
         return kline_data
-    
-    def save_kline_datapickle(self, code: str, k_type: KL_TYPE, autype: AUTYPE, kline_data: List[CKLine_Unit]) -> str:
+
+    def save_kline_data_pickle(self, code: str, k_type: KL_TYPE, autype: AUTYPE, kline_data: List[CKLine_Unit]) -> str:
         """
         保存K线数据为Pickle格式
         
@@ -302,10 +575,13 @@ class OfflineDataUtil:
         file_path = self.create_data_file_path(code, k_type, autype, 'pickle')
         
         with open(file_path, 'wb') as f:
-            pickle.dump(kline_data, f)
+            pickle.dump(kline_data, f, protocol=pickle.HIGHEST_PROTOCOL)
         
         self.logger.info(f"保存Pickle数据: {file_path}, 共{len(kline_data)}条记录")
         return file_path
+
+    # 兼容旧的方法名
+    save_kline_datapickle = save_kline_data_pickle
     
     def load_kline_data_pickle(self, code: str, k_type: KL_TYPE, autype: AUTYPE) -> List[CKLine_Unit]:
         """
@@ -349,9 +625,27 @@ class OfflineDataUtil:
             最新数据时间，如果没有数据返回None
         """
         if data_format == 'csv':
-            kline_data = self.load_kline_data_csv(code, k_type, autype)
+            # 只读取文件末尾的最后一行，无需解析整个文件
+            file_path = self.create_data_file_path(code, k_type, autype, 'csv')
+            if not os.path.exists(file_path):
+                return None
+            last_line = self._read_last_csv_line(file_path)
+            if last_line is None or last_line.startswith(CSV_HEADERS[0]):
+                return None
+            try:
+                return _parse_csv_time(last_line.split(',', 1)[0])
+            except ValueError as e:
+                self.logger.warning(f"解析最新数据时间失败: {file_path}, 错误: {e}")
+                return None
         elif data_format == 'pickle':
             kline_data = self.load_kline_data_pickle(code, k_type, autype)
+        elif data_format == 'parquet':
+            # 只读取时间列
+            file_path = self.create_data_file_path(code, k_type, autype, 'parquet')
+            if pa is None or not os.path.exists(file_path):
+                return None
+            time_column = pa_parquet.read_table(file_path, columns=[CSV_HEADERS[0]]).column(0)
+            return _parse_csv_time(time_column[-1].as_py()) if len(time_column) else None
         else:
             self.logger.warning(f"不支持的数据格式: {data_format}")
             return None
@@ -359,6 +653,36 @@ class OfflineDataUtil:
         if kline_data:
             return kline_data[-1].time
         return None
+
+    def _read_last_csv_line(self, file_path: str, chunk_size: int = 8192) -> Optional[str]:
+        """
+        读取文件最后一个非空行
+
+        从文件末尾按块向前读取，直到找到一行完整的非空内容，
+        读取量只与末尾几行的长度有关，与文件大小无关
+
+        Args:
+            file_path: 文件路径
+            chunk_size: 每次向前读取的字节数
+
+        Returns:
+            最后一个非空行，文件为空时返回None
+        """
+        with open(file_path, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            tail = b''
+            while pos > 0:
+                read_size = min(chunk_size, pos)
+                pos -= read_size
+                f.seek(pos)
+                tail = f.read(read_size) + tail
+                lines = tail.splitlines()
+                # 未读到文件开头时，块内第一行可能不完整，不参与判断
+                complete_lines = lines if pos == 0 else lines[1:]
+                for line in reversed(complete_lines):
+                    if line.strip():
+                        return line.decode('utf-8').strip()
+        return None
     
     def append_kline_data(self,code: str, k_type: KL_TYPE, autype: AUTYPE, new_data: List[CKLine_Unit], 
                          data_format: str = 'csv') -> str:
@@ -379,6 +703,8 @@ class OfflineDataUtil:
             existing_data = self.load_kline_data_csv(code, k_type, autype)
         elif data_format == 'pickle':
             existing_data = self.load_kline_data_pickle(code, k_type, autype)
+        elif data_format == 'parquet':
+            existing_data = list(self.load_kline_data_parquet(code, k_type, autype))
         else:
             self.logger.warning(f"不支持的数据格式: {data_format}")
             return ""
@@ -399,6 +725,8 @@ class OfflineDataUtil:
             return self.save_kline_data_csv(code, k_type, autype, sorted_data)
         elif data_format == 'pickle':
             return self.save_kline_data_pickle(code, k_type, autype, sorted_data)
+        elif data_format == 'parquet':
+            return self.save_kline_data_parquet(code, k_type, autype, sorted_data)
         return ""
     
     def get_stock_list(self) -> List[str]:
@@ -442,10 +770,11 @@ class OfflineDataUtil:
     def get_downloaded_stocks(self, autype: AUTYPE, stock_type: str = 'stock') -> List[str]:
         """
         获取指定复权类型和品种的已下载代码列表
+        各K线级别目录的修改时间未变化（即没有新增或删除文件）时直接返回上次的扫描结果
 
         Args:
             autype: 复权类型
-            stock_type: 'stock' 或 'reits'
+            stock_type: 'stock'、'reits' 或 'bond'
 
         Returns:
             代码列表
@@ -453,32 +782,30 @@ class OfflineDataUtil:
         offline_path = self.get_offline_data_path()
         autype_name = autype.name.lower()
         target_path = os.path.join(offline_path, autype_name)
-        
+
+        pattern = DOWNLOADED_CODE_PATTERNS.get(stock_type)
+        if pattern is None or not os.path.isdir(target_path):
+            return []
+
+        with os.scandir(target_path) as entries:
+            k_type_dirs = sorted((entry.path, entry.stat().st_mtime_ns) for entry in entries if entry.is_dir())
+        signature = tuple(k_type_dirs)
+        cache_key = (autype, stock_type)
+        cached = self._downloaded_codes_cache.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            return list(cached[1])
+
         codes = set()
-        if not os.path.exists(target_path):
-            return[]
-
-        for k_type_dir in os.listdir(target_path):
-            full_k_type_path= os.path.join(target_path, k_type_dir)
-            if os.path.isdir(full_k_type_path):
-                for file in os.listdir(full_k_type_path):
-                    if file.endswith('.csv'):
-                        code = os.path.splitext(file)[0]
-                        # 股票代码通常包含交易所前缀，如 "sz.000001" 或 "sh.600000"
-                        is_stock = '.' in code
-                        # 国债代码通常为 6 位纯数字且以 "01" 开头，例如 019547
-                        is_bond = code.isdigit() and len(code) == 6 and code.startswith('01')
-                        # REITs（粗略分类）：6 位纯数字但不以 "01" 开头，避免与国债混淆
-                        is_reit = code.isdigit() and len(code) == 6 and not code.startswith('01')
-
-                        if stock_type == 'reits' and is_reit:
-                            codes.add(code)
-                        elif stock_type == 'stock' and is_stock:
-                            codes.add(code)
-                        elif stock_type == 'bond' and is_bond:
-                            codes.add(code)
-        
-        return sorted(list(codes))
+        for k_type_path, _ in k_type_dirs:
+            with os.scandir(k_type_path) as files:
+                for entry in files:
+                    match = pattern.match(entry.name)
+                    if match:
+                        codes.add(match.group(1))
+
+        result = sorted(codes)
+        self._downloaded_codes_cache[cache_key] = (signature, result)
+        return list(result)
     
     def get_data_statistics(self) -> Dict[str, Any]:
         """
@@ -530,3 +857,25 @@ class OfflineDataUtil:
             stats['last_update'] = datetime.fromtimestamp(latest_time).strftime('%Y-%m-%d %H:%M:%S')
         
         return stats
+
+
+def get_offline_data_util(config_path: Optional[str] = None) -> OfflineDataUtil:
+    """
+    获取按配置文件路径共享的OfflineDataUtil实例
+    下载器、更新器与离线数据API共用同一实例，避免重复读取配置和初始化日志
+
+    Args:
+        config_path: 配置文件路径，默认为项目根目录下的config.yaml
+
+    Returns:
+        OfflineDataUtil实例
+    """
+    # 先把None和相对路径统一成绝对路径，保证 get_offline_data_util() 与 get_offline_data_util(None) 命中同一缓存
+    if config_path is None:
+        config_path = OfflineDataUtil._get_default_config_path()
+    return _get_offline_data_util(os.path.abspath(config_path))
+
+
+@functools.lru_cache(maxsize=8)
+def _get_offline_data_util(config_path: str) -> OfflineDataUtil:
+    return OfflineDataUtil(config_path)
@@ -7,8 +7,9 @@ import os
 import sys
 import time
 import argparse
+import threading
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from concurrent.futures import ThreadPoolExecutor,as_completed
 
 # 添加项目根目录到路径
@@ -17,11 +18,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import akshare as ak
 import pandas as pd
 
-from Common.CEnum import AUTYPE, DATA_FIELD, KL_TYPE
-from Common.CTime import CTime
+from Common.CEnum import AUTYPE, KL_TYPE
 from Common.func_util import str2float
-from KLine.KLine_Unit import CKLine_Unit
-from OfflineData.offline_data_util import OfflineDataUtil
+from OfflineData.offline_data_util import get_offline_data_util
 
 
 class AkshareReitsDownloader:
@@ -34,7 +33,7 @@ class AkshareReitsDownloader:
         Args:
             config_path: 配置文件路径
         """
-        self.util = OfflineDataUtil(config_path)
+        self.util = get_offline_data_util(config_path)
         self.logger = self.util.logger
 
         # 默认下载参数
@@ -51,6 +50,11 @@ class AkshareReitsDownloader:
             'total_records': 0,
             'failed_stocks': []
         }
+        # 多线程下载时保护download_stats的更新
+        self._stats_lock = threading.Lock()
+
+        # 已存在数据文件索引: (K线类型, 复权类型) -> {代码: 文件大小}
+        self._existing_files: Dict[Tuple[KL_TYPE, AUTYPE], Dict[str, int]] = {}
 
     def get_all_reits_codes(self) -> List[str]:
         """
@@ -63,13 +67,13 @@ class AkshareReitsDownloader:
             reits_info_df = self.get_reits_info()
             if '代码' in reits_info_df.columns:
                 codes = reits_info_df['代码'].tolist()
-                self.logger.info(f"获取到{len(codes)}只公募REITS")
+                self.logger.info("获取到%d只公募REITS", len(codes))
                 return codes
             else:
                 self.logger.error("从akshare获取REITS列表失败，返回的DataFrame中没有'代码'列")
                 return []
         except Exception as e:
-            self.logger.error(f"通过akshare获取REITS列表异常: {e}")
+            self.logger.error("通过akshare获取REITS列表异常: %s", e)
             return []
 
     def get_reits_info(self, max_retries: int = 3, retry_delay: int = 5) -> pd.DataFrame:
@@ -81,12 +85,12 @@ class AkshareReitsDownloader:
                 reits_info_df = ak.reits_realtime_em()
                 return reits_info_df
             except Exception as e:
-                self.logger.warning(f"通过akshare获取REITS列表第 {attempt+ 1} 次尝试失败: {e}")
+                self.logger.warning("通过akshare获取REITS列表第 %d 次尝试失败: %s", attempt + 1, e)
                 if attempt < max_retries - 1:
-                    self.logger.info(f"{retry_delay} 秒后重试...")
+                    self.logger.info("%s 秒后重试...", retry_delay)
                     time.sleep(retry_delay)
                 else:
-                    self.logger.error(f"通过akshare获取REITS列表失败，已达最大重试次数")
+                    self.logger.error("通过akshare获取REITS列表失败，已达最大重试次数")
                     return pd.DataFrame()
         return pd.DataFrame()
 
@@ -97,6 +101,16 @@ class AkshareReitsDownloader:
         """
         return code.replace("sh.", "").replace("sz.", "")
 
+    def _has_existing_data(self, code: str, k_type: KL_TYPE, autype: AUTYPE) -> bool:
+        """
+        判断本地是否已有非空数据文件
+        每个 (K线类型, 复权类型) 目录只扫描一次，之后按代码O(1)查找
+        """
+        key = (k_type, autype)
+        if key not in self._existing_files:
+            self._existing_files[key] = self.util.scan_data_files(k_type, autype, 'csv')
+        return self._existing_files[key].get(code, 0) > 0
+
     def download_single_reit(self, code: str, k_type: KL_TYPE,
                              start_date: str, end_date: str,
                              autype: AUTYPE = AUTYPE.QFQ,
@@ -108,19 +122,19 @@ class AkshareReitsDownloader:
         """
         # akshare reits_hist_em 接口仅支持日线、不复权数据
         if k_type != KL_TYPE.K_DAY:
-            self.logger.warning(f"Akshare REITS接口当前仅支持日线数据下载，跳过 {k_type.name}。")
+            self.logger.warning("Akshare REITS接口当前仅支持日线数据下载，跳过 %s。", k_type.name)
             return True
 
         if autype != AUTYPE.NONE:
-            self.logger.warning(f"Akshare REITS接口仅支持不复权数据，您的 --autype={autype.name} 参数将被忽略，数据将作为不复权（NONE）保存。")
+            self.logger.warning("Akshare REITS接口仅支持不复权数据，您的 --autype=%s 参数将被忽略，数据将作为不复权（NONE）保存。", autype.name)
         
         storage_autype = AUTYPE.NONE
 
         if not force_update:
-            file_path = self.util.create_data_file_path(code, k_type, storage_autype, 'csv')
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                self.logger.info(f"REIT {code} {k_type.name} {storage_autype.name} 数据已存在，跳过下载")
-                self.download_stats['skipped_count'] += 1
+            if self._has_existing_data(code, k_type, storage_autype):
+                self.logger.info("REIT %s %s %s 数据已存在，跳过下载", code, k_type.name, storage_autype.name)
+                with self._stats_lock:
+                    self.download_stats['skipped_count'] += 1
                 return True
 
         for attempt in range(max_retries):
@@ -128,48 +142,47 @@ class AkshareReitsDownloader:
                 data_df = ak.reits_hist_em(symbol=code)
 
                 if data_df.empty:
-                    self.logger.warning(f"REIT {code} {k_type.name} 没有获取到数据")
+                    self.logger.warning("REIT %s %s 没有获取到数据", code, k_type.name)
                     return True
 
                 data_df['日期'] = pd.to_datetime(data_df['日期']).dt.strftime('%Y-%m-%d')
                 data_df = data_df[(data_df['日期'] >= start_date) & (data_df['日期'] <= end_date)]
 
                 if data_df.empty:
-                    self.logger.warning(f"REIT {code} {k_type.name} 在指定日期范围 {start_date} - {end_date} 内没有数据")
+                    self.logger.warning("REIT %s %s 在指定日期范围 %s - %s 内没有数据", code, k_type.name, start_date, end_date)
                     return True
 
-                kline_data = []
-                for _, row in data_df.iterrows():
-                    dt = datetime.strptime(row['日期'], '%Y-%m-%d')
-                    item_dict = {
-                        DATA_FIELD.FIELD_TIME: CTime(dt.year, dt.month, dt.day, 0, 0),
-                        DATA_FIELD.FIELD_OPEN: row['今开'],
-                        DATA_FIELD.FIELD_HIGH: row['最高'],
-                        DATA_FIELD.FIELD_LOW: row['最低'],
-                        DATA_FIELD.FIELD_CLOSE: row['最新价'],
-                        DATA_FIELD.FIELD_VOLUME: row['成交量'],
-                        DATA_FIELD.FIELD_TURNOVER: row['成交额'],
-                        DATA_FIELD.FIELD_TURNRATE: row.get('换手', 0.0)
-                    }
-                    kline_data.append(CKLine_Unit(item_dict))
-
-                self.util.save_kline_data_csv(code, k_type, storage_autype, kline_data)
-
-                self.download_stats['success_count'] += 1
-                self.download_stats['total_records'] += len(kline_data)
-
-                self.logger.info(f"成功下载 {code} {k_type.name} ({storage_autype.name}) 数据，共{len(kline_data)}条记录")
+                # 直接按列写出，不再逐行构造CKLine_Unit列表；需要K线对象时可通过 util.iter_kline_data_csv 按需读取
+                columns = {
+                    'time': data_df['日期'].str.replace('-', '/', regex=False),
+                    'open': data_df['今开'],
+                    'high': data_df['最高'],
+                    'low': data_df['最低'],
+                    'close': data_df['最新价'],
+                    'volume': data_df['成交量'].fillna(0),
+                    'turnover': data_df['成交额'].fillna(0),
+                    'turnrate': data_df['换手'].fillna(0) if '换手' in data_df.columns else pd.Series(0.0, index=data_df.index),
+                }
+                self.util.save_kline_columns_csv(code, k_type, storage_autype, columns)
+                record_count = len(data_df)
+
+                with self._stats_lock:
+                    self.download_stats['success_count'] += 1
+                    self.download_stats['total_records'] += record_count
+
+                self.logger.info("成功下载 %s %s (%s) 数据，共%d条记录", code, k_type.name, storage_autype.name, record_count)
                 return True
 
             except Exception as e:
-                self.logger.warning(f"下载REIT {code} {k_type.name} 第 {attempt + 1} 次尝试失败: {e}")
+                self.logger.warning("下载REIT %s %s 第 %d 次尝试失败: %s", code, k_type.name, attempt + 1, e)
                 if attempt < max_retries - 1:
-                    self.logger.info(f"{retry_delay} 秒后重试...")
+                    self.logger.info("%s 秒后重试...", retry_delay)
                     time.sleep(retry_delay)
                 else:
-                    self.logger.error(f"下载REIT {code} {k_type.name} 数据失败，已达最大重试次数")
-                    self.download_stats['failed_count'] += 1
-                    self.download_stats['failed_stocks'].append(f"{code}_{k_type.name}")
+                    self.logger.error("下载REIT %s %s 数据失败，已达最大重试次数", code, k_type.name)
+                    with self._stats_lock:
+                        self.download_stats['failed_count'] += 1
+                        self.download_stats['failed_stocks'].append(f"{code}_{k_type.name}")
                     return False
         return False
 
@@ -194,20 +207,25 @@ class AkshareReitsDownloader:
         start_date = start_date or self.default_start_date
         end_date = end_date or self.default_end_date
 
-        self.logger.info(f"开始批量下载，REITS数量: {len(normalized_codes)}, K线类型: {[kt.name for kt in k_types]}")
-        self.logger.info(f"时间范围: {start_date} 到{end_date}")
+        self.logger.info("开始批量下载，REITS数量: %d, K线类型: %s", len(normalized_codes), [kt.name for kt in k_types])
+        self.logger.info("时间范围: %s 到%s", start_date, end_date)
 
         self.download_stats = {
             'success_count': 0,'failed_count': 0, 'skipped_count': 0,
             'total_records': 0, 'failed_stocks': []
         }
+        # 每批任务开始前重新扫描目录，避免使用过期的文件索引；REITS统一按不复权存储
+        self._existing_files = {}
+        if not force_update:
+            for k_type in k_types:
+                self._existing_files[(k_type, AUTYPE.NONE)] = self.util.scan_data_files(k_type, AUTYPE.NONE, 'csv')
 
         start_time = time.time()
 
         tasks = [(code, k_type, start_date, end_date, autype, force_update)
                 for code in normalized_codes for k_type in k_types]
 
-        self.logger.info(f"总共{len(tasks)}个下载任务")
+        self.logger.info("总共%d个下载任务", len(tasks))
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_task = {executor.submit(self.download_single_reit, *task): task for task in tasks}
@@ -217,7 +235,7 @@ class AkshareReitsDownloader:
                 completed += 1
                 if completed % 10 == 0:
                     progress = (completed / len(tasks)) * 100
-                    self.logger.info(f"下载进度: {completed}/{len(tasks)} ({progress:.1f}%)")
+                    self.logger.info("下载进度: %d/%d (%.1f%%)", completed, len(tasks), progress)
                 if delay_seconds > 0:
                     time.sleep(delay_seconds)
 
@@ -226,13 +244,13 @@ class AkshareReitsDownloader:
 
         self.logger.info("=" * 50)
         self.logger.info("下载完成统计:")
-        self.logger.info(f"总耗时: {duration:.2f}秒")
-        self.logger.info(f"成功: {self.download_stats['success_count']}")
-        self.logger.info(f"失败: {self.download_stats['failed_count']}")
-        self.logger.info(f"跳过: {self.download_stats['skipped_count']}")
-        self.logger.info(f"总记录数: {self.download_stats['total_records']}")
+        self.logger.info("总耗时: %.2f秒", duration)
+        self.logger.info("成功: %d", self.download_stats['success_count'])
+        self.logger.info("失败: %d", self.download_stats['failed_count'])
+        self.logger.info("跳过: %d", self.download_stats['skipped_count'])
+        self.logger.info("总记录数: %d", self.download_stats['total_records'])
         if self.download_stats['failed_stocks']:
-            self.logger.warning(f"失败的REITS: {self.download_stats['failed_stocks'][:10]}...")
+            self.logger.warning("失败的REITS: %s...", self.download_stats['failed_stocks'][:10])
 
         return self.download_stats
 
@@ -21,7 +21,37 @@ from Common.CEnum import AUTYPE, DATA_FIELD, KL_TYPE
 from Common.CTime import CTime
 from Common.func_util import str2float
 from KLine.KLine_Unit import CKLine_Unit
-from OfflineData.offline_data_util import OfflineDataUtil
+from OfflineData.offline_data_util import get_offline_data_util
+
+
+def build_reit_klines(data_df: pd.DataFrame) -> List[CKLine_Unit]:
+    """
+    将akshare返回的REIT行情DataFrame转换为K线数据列表
+
+    Args:
+        data_df: 日期列已格式化为 YYYY-MM-DD 的行情数据
+
+    Returns:
+        K线数据列表，顺序与data_df一致
+    """
+    turnrate = data_df['换手'] if '换手' in data_df.columns else [0.0] * len(data_df)
+    records = zip(data_df['日期'], data_df['今开'], data_df['最高'], data_df['最低'],
+                  data_df['最新价'], data_df['成交量'], data_df['成交额'], turnrate)
+    kline_data = []
+    for date_str, _open, high, low, close, volume, turnover, rate in records:
+        # 解析日期字符串 (格式: YYYY-MM-DD)
+        item_dict = {
+            DATA_FIELD.FIELD_TIME: CTime(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10]), 0, 0),
+            DATA_FIELD.FIELD_OPEN: _open,
+            DATA_FIELD.FIELD_HIGH: high,
+            DATA_FIELD.FIELD_LOW: low,
+            DATA_FIELD.FIELD_CLOSE: close,
+            DATA_FIELD.FIELD_VOLUME: volume,
+            DATA_FIELD.FIELD_TURNOVER: turnover,
+            DATA_FIELD.FIELD_TURNRATE: rate
+        }
+        kline_data.append(CKLine_Unit(item_dict))
+    return kline_data
 
 
 class AkshareReitsUpdater:
@@ -34,7 +64,7 @@ class AkshareReitsUpdater:
         Args:
             config_path: 配置文件路径
         """
-        self.util = OfflineDataUtil(config_path)
+        self.util = get_offline_data_util(config_path)
         self.logger = self.util.logger
 
         # 默认更新参数
@@ -85,12 +115,12 @@ class AkshareReitsUpdater:
         try:
             # akshare reits_hist_em 接口仅支持日线、不复权数据
             if k_type != KL_TYPE.K_DAY:
-                self.logger.warning(f"Akshare REITS接口当前仅支持日线数据更新，跳过 {k_type.name}。")
+                self.logger.warning("Akshare REITS接口当前仅支持日线数据更新，跳过 %s。", k_type.name)
                 self.update_stats['skipped_count'] += 1
                 return True
 
             if autype != AUTYPE.NONE:
-                self.logger.warning(f"Akshare REITS接口仅支持不复权数据，您的 --autype={autype.name} 参数将被忽略，数据将作为不复权（NONE）处理。")
+                self.logger.warning("Akshare REITS接口仅支持不复权数据，您的 --autype=%s 参数将被忽略，数据将作为不复权（NONE）处理。", autype.name)
             
             # 强制使用不复权类型进行存储和日期范围检查
             storage_autype = AUTYPE.NONE
@@ -101,14 +131,14 @@ class AkshareReitsUpdater:
             else:
                 start_date, _ = self.get_update_date_range(code, k_type, storage_autype)
                 if start_date is None:
-                    self.logger.info(f"REIT {code} {k_type.name} {storage_autype.name} 数据已是最新，跳过更新")
+                    self.logger.info("REIT %s %s %s 数据已是最新，跳过更新", code, k_type.name, storage_autype.name)
                     self.update_stats['skipped_count'] += 1
                     return True
 
             # 获取新数据 (无复权和周期参数)
             data_df =ak.reits_hist_em(symbol=code)
             if data_df.empty:
-                self.logger.info(f"REIT {code} {k_type.name} 没有获取到新数据")
+                self.logger.info("REIT %s %s 没有获取到新数据", code, k_type.name)
                 self.update_stats['skipped_count'] += 1
                 return True
 
@@ -116,45 +146,27 @@ class AkshareReitsUpdater:
             new_data_df = data_df[data_df['日期'] >= start_date]
 
             if new_data_df.empty:
-                self.logger.info(f"REIT {code} {k_type.name} 没有新数据")
+                self.logger.info("REIT %s %s 没有新数据", code, k_type.name)
                 self.update_stats['skipped_count'] += 1
                 return True
 
-            new_data = []
-            for _, row in new_data_df.iterrows():
-                # 解析日期字符串 (格式: YYYY-MM-DD)
-                date_str = row['日期']
-                year = int(date_str[:4])
-                month = int(date_str[5:7])
-                day = int(date_str[8:10])
-                
-                item_dict = {
-                    DATA_FIELD.FIELD_TIME: CTime(year, month, day, 0, 0),
-                    DATA_FIELD.FIELD_OPEN: row['今开'],
-                    DATA_FIELD.FIELD_HIGH: row['最高'],
-                    DATA_FIELD.FIELD_LOW: row['最低'],
-                    DATA_FIELD.FIELD_CLOSE: row['最新价'],
-                    DATA_FIELD.FIELD_VOLUME: row['成交量'],
-                    DATA_FIELD.FIELD_TURNOVER: row['成交额'],
-                    DATA_FIELD.FIELD_TURNRATE: row.get('换手', 0.0)
-                }
-                new_data.append(CKLine_Unit(item_dict))
+            new_data = build_reit_klines(new_data_df)
 
             if force_full_update:
                 self.util.save_kline_data_csv(code, k_type, storage_autype, new_data)
-                log_msg = f"全量更新 {code} {k_type.name} ({storage_autype.name})，共{len(new_data)}条记录"
+                log_fmt = "全量更新 %s %s (%s)，共%d条记录"
             else:
                 self.util.append_kline_data(code, k_type, storage_autype, new_data)
-                log_msg = f"增量更新 {code} {k_type.name} ({storage_autype.name})，新增{len(new_data)}条记录"
+                log_fmt = "增量更新 %s %s (%s)，新增%d条记录"
 
             self.update_stats['updated_count'] += 1
             self.update_stats['new_records'] += len(new_data)
             self.update_stats['success_count'] += 1
-            self.logger.info(log_msg)
+            self.logger.info(log_fmt, code, k_type.name, storage_autype.name, len(new_data))
             return True
 
         except Exception as e:
-            self.logger.error(f"更新REIT {code} {k_type.name} 数据失败: {e}")
+            self.logger.error("更新REIT %s %s 数据失败: %s", code, k_type.name, e)
             self.update_stats['failed_count'] += 1
             self.update_stats['failed_stocks'].append(f"{code}_{k_type.name}")
             return False
@@ -167,7 +179,7 @@ class AkshareReitsUpdater:
             self.logger.warning("REITS代码列表为空")
             return self.update_stats
 
-        self.logger.info(f"开始批量更新，REITS数量: {len(reits_codes)}")
+        self.logger.info("开始批量更新，REITS数量: %d", len(reits_codes))
         self.update_stats = {k: 0 if isinstance(v, int) else [] for k, v in self.update_stats.items()}
         start_time = time.time()
 
@@ -178,14 +190,14 @@ class AkshareReitsUpdater:
             future_to_task = {executor.submit(self.update_single_reit, *task):task for task in tasks}
             for i, future in enumerate(as_completed(future_to_task)):
                 if (i + 1) % 10 == 0:
-                    self.logger.info(f"更新进度: {i+1}/{len(tasks)}")
+                    self.logger.info("更新进度: %d/%d", i + 1, len(tasks))
                 time.sleep(kwargs.get('delay_seconds', 0.5))
 
         duration = time.time() - start_time
         self.logger.info("=" * 50)
-        self.logger.info(f"更新完成统计 (耗时: {duration:.2f}秒):")
+        self.logger.info("更新完成统计 (耗时: %.2f秒):", duration)
         for key, value in self.update_stats.items():
-            self.logger.info(f"{key}: {value if isinstance(value, int) else len(value)}")
+            self.logger.info("%s: %d", key, value if isinstance(value, int) else len(value))
         return self.update_stats
 
     def update_all_downloaded_reits(self, **kwargs) -> Dict[str, Any]:
@@ -195,7 +207,7 @@ class AkshareReitsUpdater:
         # REITs 只有不复权数据, 忽略传入的autype
         storage_autype= AUTYPE.NONE
         all_codes = self.util.get_downloaded_stocks(autype=storage_autype, stock_type='reits')
-        self.logger.info(f"检测到 {len(all_codes)} 个已下载的REITS ({storage_autype.name})")
+        self.logger.info("检测到 %d 个已下载的REITS (%s)", len(all_codes), storage_autype.name)
         kwargs['autype'] = storage_autype # 确保后续流程使用正确的autype
         return self.update_reits_list(all_codes, **kwargs)
 
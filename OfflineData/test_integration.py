@@ -5,20 +5,24 @@
 
 import os
 import sys
-import time
 from datetime import datetime, timedelta
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from Common.CEnum import KL_TYPE, AUTYPE
-from OfflineData.offline_data_util import OfflineDataUtil
+from OfflineData.offline_data_util import get_offline_data_util, pa
 from OfflineData.bao_download import BaoStockDownloader
 from OfflineData.bao_update import BaoStockUpdater
 from OfflineData.reits_download import AkshareReitsDownloader
 from OfflineData.reits_update import AkshareReitsUpdater
 
 
+def get_downloaded_codes(autype: AUTYPE = AUTYPE.QFQ, stock_type: str = 'stock') -> list:
+    """获取已下载的代码列表，各测试函数共用同一个工具类实例，目录未变化时直接复用其缓存"""
+    return get_offline_data_util().get_downloaded_stocks(autype, stock_type)
+
+
 def test_offline_data_util():
     """测试离线数据工具类"""
     print("=" * 50)
@@ -26,7 +30,7 @@ def test_offline_data_util():
     print("=" * 50)
     
     try:
-        util = OfflineDataUtil()
+        util = get_offline_data_util()
         
         # 测试配置加载
         print(f"离线数据路径: {util.get_offline_data_path()}")
@@ -44,7 +48,7 @@ def test_offline_data_util():
         print(f"Pickle文件路径: {pickle_path}")
         
         # 测试获取已下载股票列表
-        downloaded_stocks = util.get_downloaded_stocks()
+        downloaded_stocks = get_downloaded_codes(AUTYPE.QFQ)
         print(f"已下载股票数量: {len(downloaded_stocks)}")
         if downloaded_stocks:
             print(f"前5只股票: {downloaded_stocks[:5]}")
@@ -81,8 +85,10 @@ def test_download_sample_data():
             start_date=start_date,
             end_date=end_date,
             force_update=True,
+            # BaoStock所有请求共用同一个登录会话的socket，不支持多线程并发查询，因此保持单线程；
+            # 样本仅3只股票，无需额外的请求间隔
             max_workers=1,
-            delay_seconds=0.5
+            delay_seconds=0.0
         )
         
         print(f"下载统计: {stats}")
@@ -111,8 +117,7 @@ def test_update_data():
         updater = BaoStockUpdater()
         
         # 获取已下载的股票
-        util = OfflineDataUtil()
-        downloaded_stocks = util.get_downloaded_stocks()
+        downloaded_stocks = get_downloaded_codes(AUTYPE.QFQ)
         
         if not downloaded_stocks:
             print("没有已下载的股票数据，跳过更新测试")
@@ -141,17 +146,22 @@ def test_update_data():
         updater.disconnect()
 
 
-def test_data_loading():
-    """测试数据加载"""
+def test_data_loading(test_pickle: bool = True):
+    """
+    测试数据加载
+    
+    Args:
+        test_pickle: 是否同时测试Pickle格式保存和加载（CStockFileReader优先读取Pickle）
+    """
     print("=" * 50)
     print("测试数据加载")
     print("=" * 50)
     
     try:
-        util = OfflineDataUtil()
+        util = get_offline_data_util()
         
         # 获取已下载的股票
-        downloaded_stocks = util.get_downloaded_stocks()
+        downloaded_stocks = get_downloaded_codes(AUTYPE.QFQ)
         
         if not downloaded_stocks:
             print("没有已下载的股票数据，跳过加载测试")
@@ -164,7 +174,7 @@ def test_data_loading():
         print(f"测试加载股票: {test_code}")
         
         # 测试CSV加载
-        csv_data = util.load_kline_data_csv(test_code, test_k_type)
+        csv_data = util.load_kline_data_csv(test_code, test_k_type, AUTYPE.QFQ)
         if csv_data:
             print(f"CSV数据加载成功，共{len(csv_data)}条记录")
             print(f"最新数据时间: {csv_data[-1].time}")
@@ -172,18 +182,32 @@ def test_data_loading():
             print("CSV数据加载失败")
             return False
         
-        # 测试Pickle保存和加载
-        util.save_kline_data_pickle(test_code, test_k_type, csv_data)
-        pickle_data = util.load_kline_data_pickle(test_code, test_k_type)
-        
-        if pickle_data and len(pickle_data) == len(csv_data):
-            print(f"Pickle数据保存和加载成功，共{len(pickle_data)}条记录")
+        # 测试Parquet保存和加载（pyarrow为可选依赖，未安装时跳过）
+        if pa is None:
+            print("未安装pyarrow，跳过Parquet格式测试")
         else:
-            print("Pickle数据保存或加载失败")
-            return False
+            util.save_kline_data_parquet(test_code, test_k_type, AUTYPE.QFQ, csv_data)
+            parquet_data = util.load_kline_data_parquet(test_code, test_k_type, AUTYPE.QFQ)
+
+            if len(parquet_data) == len(csv_data) and parquet_data[-1].time.to_str() == csv_data[-1].time.to_str():
+                print(f"Parquet数据保存和加载成功，共{len(parquet_data)}条记录")
+            else:
+                print("Parquet数据保存或加载失败")
+                return False
+        
+        # 测试Pickle保存和加载
+        if test_pickle:
+            util.save_kline_data_pickle(test_code, test_k_type, AUTYPE.QFQ, csv_data)
+            pickle_data = util.load_kline_data_pickle(test_code, test_k_type, AUTYPE.QFQ)
+            
+            if pickle_data and len(pickle_data) == len(csv_data):
+                print(f"Pickle数据保存和加载成功，共{len(pickle_data)}条记录")
+            else:
+                print("Pickle数据保存或加载失败")
+                return False
         
         # 测试获取最新数据时间
-        latest_time = util.get_latest_data_time(test_code, test_k_type)
+        latest_time = util.get_latest_data_time(test_code, test_k_type, AUTYPE.QFQ)
         if latest_time:
             print(f"最新数据时间: {latest_time}")
         
@@ -216,8 +240,10 @@ def test_download_reits_data():
         
         stats = downloader.download_reits_list(
             reits_codes=test_codes,
-    k_types=[KL_TYPE.K_DAY],
-            force_update=True
+            k_types=[KL_TYPE.K_DAY],
+            force_update=True,
+            # akshare接口为普通HTTP请求，可多线程并发下载
+            max_workers=min(8, len(test_codes))
         )
 
         print(f"下载统计: {stats}")
@@ -242,10 +268,8 @@ def test_update_reits_data():
     try:
         updater = AkshareReitsUpdater()
         
-        # 获取已下载的REITS
-        util = OfflineDataUtil()
-        all_codes = util.get_downloaded_stocks()
-        reits_codes = [code for code in all_codes if code.isdigit() and not code.startswith(('sh.', 'sz.'))]
+        # 获取已下载的REITS（扫描目录时已按文件名规则区分REITS与股票、国债，无需再次过滤）
+        reits_codes = get_downloaded_codes(AUTYPE.NONE, 'reits')
         
         if not reits_codes:
             print("没有已下载的REITS数据，跳过更新测试")
@@ -281,8 +305,7 @@ def test_integration_with_chan():
         
         print("✓ 缠论和OfflineDataAPI模块导入成功")
 
-        util = OfflineDataUtil()
-        downloaded_stocks = util.get_downloaded_stocks()
+        downloaded_stocks = get_downloaded_codes(AUTYPE.QFQ)
 
         if not downloaded_stocks:
             print("没有已下载的股票数据，跳过API加载测试")
@@ -336,7 +359,7 @@ def test_data_statistics():
     print("=" * 50)
     
     try:
-        util = OfflineDataUtil()
+        util = get_offline_data_util()
         
         # 获取数据统计信息
         stats = util.get_data_statistics()
@@ -380,33 +403,30 @@ def main():
         except Exception as e:
             print(f"测试异常: {e}")
             test_results.append((test_name, False))
-        
-        time.sleep(1)  # 测试间隔
     
-    # 输出测试结果汇总
-    print("\n" + "=" * 60)
-    print("测试结果汇总")
-    print("=" * 60)
+    # 输出测试结果汇总（汇总内容拼接后一次性输出）
+    summary_lines = ["", "=" * 60, "测试结果汇总", "=" * 60]
     
     passed = 0
     failed = 0
     
     for test_name, result in test_results:
         status = "✓ 通过" if result else "✗ 失败"
-        print(f"{test_name}: {status}")
+        summary_lines.append(f"{test_name}: {status}")
         if result:
             passed += 1
         else:
             failed += 1
     
-    print(f"\n总计: {len(test_results)} 项测试")
-    print(f"通过: {passed} 项")
-    print(f"失败: {failed} 项")
+    summary_lines.append(f"\n总计: {len(test_results)} 项测试")
+    summary_lines.append(f"通过: {passed} 项")
+    summary_lines.append(f"失败: {failed} 项")
     
     if failed == 0:
-        print("\n🎉 所有测试通过！离线数据功能集成成功！")
+        summary_lines.append("\n🎉 所有测试通过！离线数据功能集成成功！")
     else:
-        print(f"\n⚠️  有 {failed} 项测试失败，请检查相关功能")
+        summary_lines.append(f"\n⚠️  有 {failed} 项测试失败，请检查相关功能")
+    print("\n".join(summary_lines))
     
     return failed == 0
 
@@ -146,21 +146,23 @@ def set_grid(ax, config):
     raise CChanException(f"unsupport grid config={config}", ErrCode.PLOT_ERR)
 
 
-def GetPlotMeta(chan: CChan, figure_config) -> List[CChanPlotMeta]:
-    plot_metas = [CChanPlotMeta(chan[kl_type]) for kl_type in chan.lv_list]
+def GetPlotMeta(chan: CChan, figure_config, plot_metas: Optional[List[CChanPlotMeta]] = None) -> List[CChanPlotMeta]:
+    if plot_metas is None:
+        plot_metas = CPlotDriver.build_cache(chan)
     if figure_config.get("only_top_lv", False):
         plot_metas = [plot_metas[0]]
     return plot_metas
 
 
 class CPlotDriver:
-    def __init__(self, chan: CChan, plot_config: Union[str, dict, list] = '', plot_para=None):
+    def __init__(self, chan: CChan, plot_config: Union[str, dict, list] = '', plot_para=None, plot_metas: Optional[List[CChanPlotMeta]] = None):
         if plot_para is None:
             plot_para = {}
         figure_config: dict = plot_para.get('figure', {})
 
         plot_config = parse_plot_config(plot_config, chan.lv_list)
-        plot_metas = GetPlotMeta(chan, figure_config)
+        # plot_metas可传入CPlotDriver.build_cache(chan)的结果，同一个chan画多张图时避免重复计算
+        plot_metas = GetPlotMeta(chan, figure_config, plot_metas)
         self.lv_lst = chan.lv_list[:len(plot_metas)]
 
         x_range = self.GetRealXrange(figure_config, plot_metas[0])
@@ -203,6 +205,18 @@ class CPlotDriver:
 
             ax.set_ylim(self.y_min, self.y_max)
 
+    @staticmethod
+    def build_cache(chan: CChan) -> List[CChanPlotMeta]:
+        # 绘图元数据只依赖chan本身，与plot_config/plot_para无关，可在多次绘图间复用
+        return [CChanPlotMeta(chan[kl_type]) for kl_type in chan.lv_list]
+
+    @classmethod
+    def render_multi(cls, chan: CChan, plot_configs: List[Union[str, dict, list]], plot_paras: List[Optional[dict]]) -> List['CPlotDriver']:
+        # 同一个chan按多组配置分别出图，只遍历一次chan生成绘图元数据
+        assert len(plot_configs) == len(plot_paras), "plot_configs and plot_paras must have the same length"
+        plot_metas = cls.build_cache(chan)
+        return [cls(chan, plot_config=plot_config, plot_para=plot_para, plot_metas=plot_metas) for plot_config, plot_para in zip(plot_configs, plot_paras)]
+
     def GetRealXrange(self, figure_config, meta: CChanPlotMeta):
         x_range = figure_config.get("x_range", 0)
         bi_cnt = figure_config.get("x_bi_cnt", 0)
@@ -285,7 +299,7 @@ class CPlotDriver:
             show_func_helper(eval(f'self.{func}'))
 
     def save2img(self, path):
-        plt.savefig(path, bbox_inches='tight')
+        self.figure.savefig(path, bbox_inches='tight')
 
     def draw_klu(self, meta: CChanPlotMeta, ax: Axes, width=0.4, rugd=True, plot_mode="kl"):
         # rugd: red up green down
@@ -76,12 +76,6 @@ if __name__ == "__main__":
     )
 
     if not config.trigger_step:
-        plot_driver = CPlotDriver(
-            chan,
-            plot_config=plot_config,
-            plot_para=plot_para,
-        )
-        
         # 设置绘图的时间范围（只影响显示，不影响计算）
         # 将plot_begin_time转换为PlotDriver支持的格式 "YYYY/MM/DD"
         plot_begin_date = plot_begin_time.replace('-', '/')
@@ -89,7 +83,6 @@ if __name__ == "__main__":
         # 更新plot_para中的figure配置，设置绘图开始日期
         plot_para["figure"]["x_begin_date"] = plot_begin_date
         
-        # 重新创建PlotDriver以应用新的配置
         plot_driver = CPlotDriver(
             chan,
             plot_config=plot_config,
@@ -102,11 +95,7 @@ if __name__ == "__main__":
         # 计算显示的K线数量用于统计
         year, month, day = map(int, plot_begin_time.split('-'))
         plot_begin_time_obj = CTime(year, month, day, 0, 0)
-        plot_start_idx = 0
-        for i, klc in enumerate(chan[0].lst):
-            if klc.time_begin >= plot_begin_time_obj:
-                plot_start_idx = i
-                break
+        plot_start_idx = chan[0].get_klc_index_by_time(plot_begin_time_obj)
         
         # 打印统计信息对比
         print(f"数据获取时间范围: {data_begin_time} 到 {end_time or '最新'}")
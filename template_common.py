@@ -0,0 +1,230 @@
+import os
+import sys
+import logging
+import threading
+from Common.CTime import CTime
+
+# 菜单提示语：REITs模板沿用英文提示，其余模板为中文
+MENU_TEXTS = {
+    'zh': {
+        'help': "'n' 下一页, 'p' 上一页, 'q' 退出。",
+        'prompt': "请输入序号 (1-{total}) 或命令: ",
+        'last_page': "已是最后一页。",
+        'first_page': "已是第一页。",
+        'invalid': "输入无效，请重试。",
+    },
+    'en': {
+        'help': "'n' for next page, 'p' for previous page, 'q' to quit.",
+        'prompt': "Enter option (1-{total}) or command: ",
+        'last_page': "Already on the last page.",
+        'first_page': "Already on the first page.",
+        'invalid': "Invalid input, please try again.",
+    },
+}
+
+# 后台预取线程名，用于过滤其日志
+PREFETCH_THREAD_NAME = 'chan-prefetch'
+
+
+class _PrefetchLogFilter(logging.Filter):
+    """丢弃后台预取线程中的日志，避免打印在菜单的输入提示上"""
+
+    def filter(self, record):
+        return record.threadName != PREFETCH_THREAD_NAME
+
+
+def start_prefetch(prefetch_threads, code, target, *args):
+    """
+    在后台守护线程中执行预取任务target(code, *args)，预取期间OfflineDataUtil的日志不输出。
+
+    Args:
+        prefetch_threads: 代码 -> 预取线程，选中某代码时从中取出对应线程并join
+        code: 预取的代码，该代码已有预取线程在运行时不重复启动
+    """
+    logger = logging.getLogger('OfflineDataUtil')
+    if not any(isinstance(f, _PrefetchLogFilter) for f in logger.filters):
+        logger.addFilter(_PrefetchLogFilter())
+    # 清理已结束的线程，避免字典随浏览次数增长
+    for finished_code in [c for c, t in prefetch_threads.items() if not t.is_alive()]:
+        del prefetch_threads[finished_code]
+    if code in prefetch_threads:
+        return
+    thread = threading.Thread(target=target, args=(code, *args), name=PREFETCH_THREAD_NAME, daemon=True)
+    prefetch_threads[code] = thread
+    thread.start()
+
+
+def join_prefetch(prefetch_threads, code):
+    """选中的代码有预取线程（无论是否最近启动）时等待其完成，避免与主线程重复计算"""
+    thread = prefetch_threads.pop(code, None)
+    if thread is not None:
+        thread.join()
+
+
+def scan_codes(path, predicate):
+    """
+    扫描平铺的数据目录，返回文件名（去掉.csv）满足predicate的代码列表，目录不存在时返回空列表。
+    """
+    codes = []
+    if not os.path.isdir(path):
+        return codes
+    with os.scandir(path) as it:
+        for entry in it:
+            if not entry.name.endswith(".csv"):
+                continue
+            stem = entry.name[:-4]
+            if predicate(stem) and entry.is_file():
+                codes.append(stem)
+    return codes
+
+
+def display_menu(items_dict, title, page_size=10, lang='zh', empty_msg=None):
+    """
+    分页显示代码与名称并让用户选择。
+
+    Args:
+        items_dict: 代码 -> 名称
+        title: 菜单标题
+        page_size: 每页显示数量
+        lang: 提示语言，'zh' 或 'en'
+        empty_msg: 没有可选项时打印的提示
+
+    Returns:
+        用户选择的代码，或 None 表示退出
+    """
+    texts = MENU_TEXTS[lang]
+    codes = list(items_dict)
+    if not codes:
+        if empty_msg:
+            print(empty_msg)
+        return None
+    total = len(codes)
+    max_page = (total - 1) // page_size
+    prompt = texts['prompt'].format(total=total)
+
+    # 命令分发表：处理函数返回新的页码，返回None表示退出
+    def _next(page):
+        if page < max_page:
+            return page + 1
+        print(texts['last_page'])
+        return page
+
+    def _prev(page):
+        if page > 0:
+            return page - 1
+        print(texts['first_page'])
+        return page
+
+    def _quit(page):
+        return None
+
+    commands = {'n': _next, 'N': _next, 'p': _prev, 'P': _prev, 'q': _quit, 'Q': _quit}
+    page = 0
+    while True:
+        start_index = page * page_size
+        end_index = start_index + page_size
+
+        # 只格式化当前页的菜单行，拼接后一次性写出
+        lines = [
+            f"{i}: {code} {items_dict[code]}"
+            for i, code in enumerate(codes[start_index:end_index], start=start_index + 1)
+        ]
+        sys.stdout.write(f"\n{title}\n" + "\n".join(lines) + f"\n\n{texts['help']}\n")
+        choice = input(prompt)
+
+        handler = commands.get(choice)
+        if handler is not None:
+            page = handler(page)
+            if page is None:
+                return None
+            continue
+        # str.isdigit对'²'等上标数字也返回True，但int()无法解析，只接受ASCII数字
+        index = int(choice) - 1 if choice.isascii() and choice.isdigit() else -1
+        if 0 <= index < total:
+            return codes[index]
+        print(texts['invalid'])
+
+
+def make_plot_paras(plot_para, plot_begin_date=None):
+    """
+    CPlotDriver只读取配置，浅拷贝并替换figure子字典即可，不会污染原配置。
+
+    Args:
+        plot_para: 模板配置中的plot_para
+        plot_begin_date: 绘图开始日期 "YYYY/MM/DD"，None表示显示全部数据
+
+    Returns:
+        (显示区间的plot_para, 全历史的plot_para)
+    """
+    figure_full = {k: v for k, v in plot_para.get("figure", {}).items() if k != "x_begin_date"}
+    plot_para_full = {**plot_para, "figure": figure_full}
+    if plot_begin_date is None:
+        return plot_para_full, plot_para_full
+    return {**plot_para, "figure": {**figure_full, "x_begin_date": plot_begin_date}}, plot_para_full
+
+
+def make_full_plot_config(plot_config):
+    """
+    全历史图的绘图配置：在原配置基础上禁用K线与Demark，其余保持一致。
+    """
+    plot_config_full = dict(plot_config)
+    # 兼容未添加前缀的情况
+    for key in ("plot_kline", "kline"):
+        plot_config_full[key] = False
+    for key in ("plot_demark", "demark"):
+        plot_config_full[key] = False
+    return plot_config_full
+
+
+def show_maximized(figure):
+    """
+    最大化显示绘图窗口。窗口已是最大化状态（如复用的图）时不再重复设置；
+    只有Tk后端支持state('zoomed')，其他后端或平台不支持时直接显示。
+    """
+    window = getattr(figure.canvas.manager, 'window', None)
+    try:
+        if window.state() != 'zoomed':
+            window.state('zoomed')
+    except Exception:
+        pass
+    figure.show()
+
+
+def print_chan_summary(chan, data_range, plot_begin_time=None):
+    """
+    打印数据/绘图范围、K线数量、中枢与买卖点数量。
+
+    Args:
+        chan: 单级别的CChan
+        data_range: 数据获取时间范围的描述文字
+        plot_begin_time: 绘图开始日期 "YYYY-MM-DD"，None表示显示全部数据
+    """
+    total_klc = len(chan[0].lst)
+    print(f"\n数据获取时间范围: {data_range}")
+    if plot_begin_time is not None:
+        year, month, day = map(int, plot_begin_time.split('-'))
+        plot_start_idx = chan[0].get_klc_index_by_time(CTime(year, month, day, 0, 0))
+        print(f"绘图显示时间范围: {plot_begin_time} 到最新")
+        print(f"总K线数量: {total_klc}")
+        print(f"显示K线数量: {total_klc - plot_start_idx}")
+    else:
+        print(f"绘图显示时间范围: 全部数据")
+        print(f"总K线数量: {total_klc}")
+        print(f"显示K线数量: {total_klc}")
+    print(f"中枢数量: {len(chan[0].zs_list)}")
+    print(f"买卖点数量: {len(chan.get_bsp())}")
+
+
+def print_last_zs(chan, lv_desc, empty_msg=None):
+    """
+    输出最近一个中枢的顶和底价格，没有中枢时打印empty_msg（为None则不输出）。
+    """
+    if len(chan[0].zs_list) > 0:
+        last_zs = chan[0].zs_list[-1]
+        try:
+            print(f"最近一个中枢（{lv_desc}）顶: {last_zs.high:.2f} 底: {last_zs.low:.2f}")
+        except Exception:
+            # 兜底处理，确保即使价格不是数值类型也能打印
+            print(f"最近一个中枢（{lv_desc}）顶: {last_zs.high} 底: {last_zs.low}")
+    elif empty_msg:
+        print(empty_msg)
@@ -1,83 +1,75 @@
 import os
-import yaml
-import copy
-import akshare as ak
+import argparse
 from Chan import CChan
 from ChanConfig import CChanConfig
+from Common.cache import disk_memoize, load_yaml_cached
 from Common.CEnum import AUTYPE, KL_TYPE
-from Plot.PlotDriver import CPlotDriver
 from datetime import datetime, timedelta
+from template_common import display_menu, join_prefetch, make_full_plot_config, make_plot_paras, print_chan_summary, print_last_zs, scan_codes, show_maximized, start_prefetch
+
+# 全历史图缓存：(code, K线数量, 中枢数量) -> CPlotDriver，重复查看同一标的且数据未变时直接复用已绘制的窗口
+_full_fig_cache = {}
+# 后台预取结果：(code, 数据开始时间) -> CChan，用户查看当前图时预先计算列表中的下一个REIT
+_prefetch_cache = {}
 
 def get_reits_list(path):
     """
     Scans the directory for REITs data files.
     REITs codes are pure numbers.
     """
-    reits_list = []
-    for root, dirs, files in os.walk(path):
-        for file in files:
-            # Check if the filename (without extension) is a pure number
-            if file.endswith(".csv") and file.split('.csv')[0].isdigit():
-                reits_list.append(file.split('.csv')[0])
-    return reits_list
+    return scan_codes(path, str.isdigit)
+
+def build_reit_chan(code, data_begin_time, data_src, chan_config):
+    """
+    Builds the daily CChan for a REIT. CChanConfig consumes the dict it is given, so a copy is passed.
+    """
+    return CChan(
+        code=code,
+        begin_time=data_begin_time,  # 数据获取用更早的时间
+        end_time=None,
+        data_src=data_src,
+        lv_list=[KL_TYPE.K_DAY],  # Only process daily data for REITs
+        config=CChanConfig(dict(chan_config)),
+        autype=AUTYPE.NONE, # Use non-adjusted data
+    )
+
+def prefetch_reit_chan(code, data_begin_time, data_src, chan_config):
+    """
+    Background worker: computes the next REIT while the user is looking at the current plot.
+    """
+    try:
+        _prefetch_cache[(code, data_begin_time)] = build_reit_chan(code, data_begin_time, data_src, chan_config)
+    except Exception:
+        # 预取失败不影响正常流程，选中时会重新计算
+        pass
 
+@disk_memoize(path='data/cache/reits_names.pkl', ttl_seconds=24 * 3600)
 def get_reits_name_map():
     """
     Fetches REITs information from akshare and returnsa code-to-name mapping.
+    The mapping is cached on disk for 24 hours; pass --refresh-names to force a refetch.
     """
     try:
+        # akshare is only imported when the name cache has expired
+        import akshare as ak
         reits_info_df = ak.reits_realtime_em()
         # Create a dictionary mapping '代码' to '名称'
-        return dict(zip(reits_info_df['代码'], reits_info_df['名称']))
+        return dict(zip(reits_info_df['代码'].tolist(), reits_info_df['名称'].tolist()))
     except Exception as e:
         print(f"Error fetching REITs info from akshare: {e}")
         return {}
 
-def display_menu(reits_dict, page_size=10):
-    """
-    Displays a paginated menu of REITs for user selection.
-    """
-    reits_items = list(reits_dict.items())
-    if not reits_items:
-        print("No local REITs data found to display.")
-        return None    
-    page = 0
-    while True:
-        start_index = page * page_size
-        end_index = start_index + page_size
-        
-        print("\nPlease select the REIT to analyze:")
-        for i, (code, name) in enumerate(reits_items[start_index:end_index], start=start_index):
-            print(f"{i + 1}: {code} {name}")
-
-        print("\n'n' for next page, 'p' for previous page, 'q' to quit.")
-        choice = input(f"Enter option (1-{len(reits_items)}) or command: ")
-
-        if choice.lower() == 'n':
-            if end_index < len(reits_items):
-                page += 1
-            else:
-                print("Already on the last page.")
-        elif choice.lower() == 'p':
-            if page > 0:
-                page -= 1
-            else:
-                print("Already on the first page.")
-        elif choice.lower() == 'q':
-            return None
-        elif choice.isdigit() and 1 <= int(choice) <= len(reits_items):
-            return reits_items[int(choice) - 1][0]
-        else:
-            print("Invalid input, please try again.")
-
-
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='REITs Chan analysis')
+    parser.add_argument('--refresh-names', action='store_true', help='Ignore the local cache and refetch REITs names from akshare')
+    args = parser.parse_args()
+    if args.refresh_names:
+        get_reits_name_map.cache_clear()
+
     # Load config from YAML files
-    with open('Config/config.yaml', 'r', encoding='utf-8') as f:
-        app_config =yaml.safe_load(f)
+    app_config = load_yaml_cached('Config/config.yaml')
    
-    with open('Config/template_reits.yaml', 'r', encoding='utf-8') as f:
-        config_data = yaml.safe_load(f)
+    config_data = load_yaml_cached('Config/template_reits.yaml')
 
     # REITs data is daily and non-adjusted, stored in the 'none' folder
     offline_path = os.path.join(app_config.get('offline_data', {}).get('path', 'data/offline'), 'none', 'day')
@@ -93,17 +85,22 @@ if __name__ == "__main__":
     
     # Filter the name map to only include REITs we have locally
     local_reits_details = {code: name_map.get(code, "N/A") for code in local_reits_codes}
+    # 代码 -> 后台预取线程
+    prefetch_threads = {}
 
     while True:
-        selected_code = display_menu(local_reits_details)
+        selected_code = display_menu(local_reits_details, "Please select the REIT to analyze:", lang='en', empty_msg="No local REITs data found to display.")
 
         if not selected_code:
             print("未选择REIT，程序退出。")
             break
+        # Import the plotting stack (matplotlib) only once a REIT has been selected
+        import matplotlib.pyplot as plt
+        from Plot.PlotDriver import CPlotDriver
 
         # Load configurations for the selected REIT
         data_src = config_data['data_src']
-        chanconfig = CChanConfig(config_data['chan_config'])
+        chan_config = config_data['chan_config']
         plot_config = config_data['plot_config']
         plot_para = config_data['plot_para']
 
@@ -115,89 +112,51 @@ if __name__ == "__main__":
         # 绘图显示：使用一年前的时间（用户关心的时间段）
         plot_begin_time = (now - timedelta(days=365)).strftime('%Y-%m-%d')
 
-        chan = CChan(
-            code=selected_code,
-            begin_time=data_begin_time,  # 数据获取用更早的时间
-            end_time=None,
-            data_src=data_src,
-            lv_list=[KL_TYPE.K_DAY],  # Only process daily data for REITs
-            config=chanconfig,
-            autype=AUTYPE.NONE, # Use non-adjusted data
-        )
+        # 选中的REIT仍在后台预取时等待其完成，避免重复计算
+        join_prefetch(prefetch_threads, selected_code)
+        chan = _prefetch_cache.pop((selected_code, data_begin_time), None)
+        _prefetch_cache.clear()
+        if chan is None:
+            chan = build_reit_chan(selected_code, data_begin_time, data_src, chan_config)
 
         # 设置绘图的时间范围（只影响显示，不影响计算）
         # 将plot_begin_time转换为PlotDriver支持的格式 "YYYY/MM/DD"
         plot_begin_date = plot_begin_time.replace('-', '/')
 
-        # 每次绘图前深拷贝 plot_para，避免跨标的的配置污染
-        plot_para_local = copy.deepcopy(plot_para)
-        
-        # 确保plot_para中有figure配置
-        if "figure" not in plot_para_local:
-            plot_para_local["figure"] = {}
-        
-        # 更新plot_para中的figure配置，设置绘图开始日期
-        plot_para_local["figure"]["x_begin_date"] = plot_begin_date
-
-        plot_driver = CPlotDriver(
-            chan,
-            plot_config=plot_config,
-            plot_para=plot_para_local,
-        )
+        # 额外绘制：全历史日线缠论分析（不绘制K线与Demark，其余保持一致）
+        plot_para_local, plot_para_full = make_plot_paras(plot_para, plot_begin_date)
+        plot_config_full = make_full_plot_config(plot_config)
+
+        # 窗口已关闭的图不再复用，及时移出缓存，避免缓存无限增长并持有已关闭的figure
+        for stale_key in [k for k, d in _full_fig_cache.items() if not plt.fignum_exists(d.figure.number)]:
+            del _full_fig_cache[stale_key]
+        full_fig_key = (selected_code, len(chan[0].lst), len(chan[0].zs_list))
+        plot_driver_full = _full_fig_cache.get(full_fig_key)
+        if plot_driver_full is not None:
+            # 数据未变且窗口仍打开，只重绘显示区间图
+            plot_driver = CPlotDriver(chan, plot_config=plot_config, plot_para=plot_para_local)
+        else:
+            # 两张图都在主线程创建（matplotlib/Tk窗口非线程安全），共用同一次遍历chan生成的绘图元数据
+            plot_driver, plot_driver_full = CPlotDriver.render_multi(
+                chan,
+                plot_configs=[plot_config, plot_config_full],
+                plot_paras=[plot_para_local, plot_para_full],
+            )
+            _full_fig_cache[full_fig_key] = plot_driver_full
         # Maximize the plot window
-        mng = plot_driver.figure.canvas.manager
-        mng.window.state('zoomed')
-        plot_driver.figure.show()
+        show_maximized(plot_driver.figure)
+        show_maximized(plot_driver_full.figure)
 
-        # 额外绘制：全历史日线缠论分析（不绘制K线与Demark，其余保持一致）
-        plot_para_full = copy.deepcopy(plot_para)
-        # 移除绘图开始日期，显示全部数据
-        if "figure" in plot_para_full and "x_begin_date" in plot_para_full["figure"]:
-            del plot_para_full["figure"]["x_begin_date"]
-
-        # 在原绘图配置基础上禁用K线与Demark
-        plot_config_full = copy.deepcopy(plot_config)
-        # 兼容未添加前缀的情况
-        for key in ("plot_kline", "kline"):
-            plot_config_full[key] = False
-        for key in ("plot_demark", "demark"):
-            plot_config_full[key] = False
-
-        plot_driver_full = CPlotDriver(
-            chan,
-            plot_config=plot_config_full,
-            plot_para=plot_para_full,
-        )
-        mng_full = plot_driver_full.figure.canvas.manager
-        mng_full.window.state('zoomed')
-        plot_driver_full.figure.show()
+        # 用户查看图表期间，在后台线程中预先计算列表中的下一个REIT
+        next_index = local_reits_codes.index(selected_code) + 1
+        if next_index < len(local_reits_codes):
+            start_prefetch(prefetch_threads, local_reits_codes[next_index], prefetch_reit_chan,
+                           data_begin_time, data_src, chan_config)
 
         # 打印统计信息对比
-        from Common.CTime import CTime
-        year, month, day = map(int, plot_begin_time.split('-'))
-        plot_begin_time_obj = CTime(year, month, day, 0, 0)
-        plot_start_idx = 0
-        for i, klc in enumerate(chan[0].lst):
-            if klc.time_begin >= plot_begin_time_obj:
-                plot_start_idx = i
-                break
-        
-        print(f"\n数据获取时间范围: {data_begin_time} 到最新")
-        print(f"绘图显示时间范围: {plot_begin_time} 到最新")
-        print(f"总K线数量: {len(chan[0].lst)}")
-        print(f"显示K线数量: {len(chan[0].lst) - plot_start_idx}")
-        print(f"中枢数量: {len(chan[0].zs_list)}")
-        print(f"买卖点数量: {len(chan.get_bsp())}")
-
+        print_chan_summary(chan, f"{data_begin_time} 到最新", plot_begin_time)
         # 输出最近一个中枢的顶和底价格（仅日线）
-        if len(chan[0].zs_list) > 0:
-            last_zs = chan[0].zs_list[-1]
-            try:
-                print(f"最近一个中枢（日线）顶: {last_zs.high:.2f} 底: {last_zs.low:.2f}")
-            except Exception:
-                print(f"最近一个中枢（日线）顶: {last_zs.high} 底: {last_zs.low}")
-        else:
-            print("暂无日线中枢数据，未输出顶/底价格。")
+        print_last_zs(chan, "日线", "暂无日线中枢数据，未输出顶/底价格。")
 
         # 查看完一个标的后提示继续选择或退出
         choice = input("输入 'q' 退出，或按回车继续选择其他REIT: ")
@@ -1,68 +1,112 @@
 import os
-import yaml
-import copy
+import glob
+import json
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from Chan import CChan
 from ChanConfig import CChanConfig
+from Common.cache import load_json_cache, load_yaml_cached, save_json_cache
 from Common.CEnum import AUTYPE, KL_TYPE
 from Plot.PlotDriver import CPlotDriver
 from datetime import datetime, timedelta
 from DataAPI.BaoStockAPI import CBaoStock
+from OfflineData.offline_data_util import get_offline_data_util
+from template_common import display_menu, join_prefetch, make_full_plot_config, make_plot_paras, print_chan_summary, print_last_zs, scan_codes, show_maximized, start_prefetch
 
 def get_stock_list(path):
-    stock_list = []
-    for root, dirs, files in os.walk(path):
-        for file in files:
-            if file.endswith(".csv") and (file.startswith("sh.") or file.startswith("sz.")):
-                stock_list.append(file.split('.csv')[0])
-    return stock_list
-
-def get_stock_name(code):
+    # 数据目录是平铺的，单次scandir即可，无需os.walk递归
+    return scan_codes(path, lambda code: code.startswith(("sh.", "sz.")))
+
+STOCK_NAME_CACHE_PATH = 'data/cache/stock_names.json'
+CHAN_CACHE_DIR = 'data/cache/chan'
+# chan_dump_pickle会临时修改进程级的递归深度上限，主线程与预取线程的写缓存必须串行
+_chan_dump_lock = threading.Lock()
+
+def get_chan_cache_path(code, lv, chan_config, end_time):
+    """
+    CChan计算结果缓存文件路径，由本地K线文件的mtime与缠论配置共同决定，任一变化即失效。
+    本地没有该级别数据时返回None。
+    """
+    util = get_offline_data_util()
+    data_mtimes = []
+    for data_format in ('pickle', 'csv'):
+        file_path = util.create_data_file_path(code, lv, AUTYPE.QFQ, data_format)
+        if os.path.exists(file_path):
+            data_mtimes.append(os.stat(file_path).st_mtime_ns)
+    if not data_mtimes:
+        return None
+    key = json.dumps([data_mtimes, chan_config, end_time], sort_keys=True, default=str)
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CHAN_CACHE_DIR, f"{code}_{lv.name}_{digest}.pkl")
+
+def load_chan_cache(cache_path):
+    if cache_path is None or not os.path.exists(cache_path):
+        return None
     try:
-        stock_api = CBaoStock(code=code)
-        stock_api.SetBasciInfo()
-        return stock_api.name
+        return CChan.chan_load_pickle(cache_path)
     except Exception:
-        return "N/A"
-
-def display_menu(stock_dict, page_size=10):
-    stock_items = list(stock_dict.items())
-    page = 0
-    while True:
-        start_index = page * page_size
-        end_index = start_index + page_size
-        
-        print("\n请选择要分析的股票:")
-        for i, (code, name) in enumerate(stock_items[start_index:end_index], start=start_index):
-            print(f"{i + 1}: {code} {name}")
-
-        print("\n'n' for next page, 'p' for previous page, 'q' to quit.")
-        choice = input(f"请输入选项 (1-{len(stock_items)}) 或命令: ")
-
-        if choice.lower() == 'n':
-            if end_index < len(stock_items):
-                page += 1
-            else:
-                print("已经是最后一页。")
-        elif choice.lower() == 'p':
-            if page > 0:
-                page -= 1
-            else:
-                print("已经是第一页。")
-        elif choice.lower() == 'q':
-            return None
-        elif choice.isdigit() and 1 <= int(choice) <= len(stock_items):
-            return stock_items[int(choice) - 1][0]
-        else:
-            print("无效输入，请重试。")
+        return None
+
+def save_chan_cache(chan, cache_path):
+    """
+    chan_dump_pickle会断开chan内部K线/笔/线段的前后链接，必须在chan用完之后再调用。
+    """
+    os.makedirs(CHAN_CACHE_DIR, exist_ok=True)
+    prefix = os.path.basename(cache_path).rsplit('_', 1)[0]
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with _chan_dump_lock:
+        # 同一股票同一级别只保留最新的一份缓存
+        for stale_path in glob.glob(os.path.join(glob.escape(CHAN_CACHE_DIR), glob.escape(prefix) + '_*.pkl')):
+            if stale_path != cache_path:
+                os.remove(stale_path)
+        chan.chan_dump_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
 
+def build_chan_cache(code, lv_str, end_time, data_src, chan_config, cache_path):
+    """
+    进程池worker：计算单个级别的CChan并写入磁盘缓存。
+    CChan内部链表太深，不便直接跨进程返回，主进程通过load_chan_cache读取结果。
+    """
+    chan = CChan(
+        code=code,
+        begin_time=None,
+        end_time=end_time,
+        data_src=data_src,
+        lv_list=[KL_TYPE[lv_str]],
+        config=CChanConfig(dict(chan_config)),
+        autype=AUTYPE.QFQ,
+    )
+    save_chan_cache(chan, cache_path)
+    return cache_path
+
+def prefetch_chan_cache(code, levels, end_time, data_src, chan_config):
+    """
+    后台线程：用户查看当前股票时，预先计算下一只股票各级别的CChan并写入磁盘缓存。
+    """
+    for lv_str in levels:
+        cache_path = get_chan_cache_path(code, KL_TYPE[lv_str], chan_config, end_time)
+        if cache_path is None or os.path.exists(cache_path):
+            continue
+        try:
+            build_chan_cache(code, lv_str, end_time, data_src, chan_config, cache_path)
+        except Exception:
+            # 预取失败不影响正常流程，选中时会重新计算
+            pass
+
+def get_stock_name_map():
+    # 一次批量查询全部股票名称，失败时返回空字典
+    try:
+        return CBaoStock.query_all_stock_names()
+    except Exception:
+        return {}
 
 if __name__ == "__main__":
     # Load config from YAML file
-    with open('Config/config.yaml', 'r', encoding='utf-8') as f:
-        app_config = yaml.safe_load(f)
+    app_config = load_yaml_cached('Config/config.yaml')
    
-    with open('Config/template_stock.yaml', 'r', encoding='utf-8') as f:
-        config_data = yaml.safe_load(f)
+    config_data = load_yaml_cached('Config/template_stock.yaml')
 
     offline_path = os.path.join(app_config.get('offline_data', {}).get('path', 'data/offline'), 'qfq', 'day')
     
@@ -74,149 +118,156 @@ if __name__ == "__main__":
         exit()
 
     print("正在获取股票名称...")
-    CBaoStock.do_init()
-    stock_details = {code: get_stock_name(code) for code in stock_codes}
-    CBaoStock.do_close()
-
-    while True:
-        selected_code = display_menu(stock_details)
-
-        if not selected_code:
-            print("未选择股票，程序退出。")
-            break
-
-        # Use selected code and load other configs
-        code = selected_code
-        end_time = config_data['end_time']
-        data_src = config_data['data_src']
-        chanconfig = CChanConfig(config_data['chan_config'])
-        plot_config = config_data['plot_config']
-        plot_para = config_data['plot_para']
-        levels_to_process = config_data['levels']
-
-        # Define levels and their corresponding start times
-        now = datetime.now()
-        level_start_times = {
-            'K_MON': None,  # All data
-            'K_WEEK': (now - timedelta(days=3 * 365)).strftime('%Y-%m-%d'),  # Last 3 years
-            'K_DAY': (now - timedelta(days=365)).strftime('%Y-%m-%d'),  # Last 1 year
-            'K_60M': (now - timedelta(days=60)).strftime('%Y-%m-%d'),   # Last 60 days
-            'K_30M': (now - timedelta(days=30)).strftime('%Y-%m-%d'),   # Last 30 days
-            'K_15M': (now - timedelta(days=15)).strftime('%Y-%m-%d'),   # Last 15 days
-            'K_5M': (now - timedelta(days=5)).strftime('%Y-%m-%d'),    # Last 5 days
-            'K_1M': (now - timedelta(days=1)).strftime('%Y-%m-%d'),     # Last 1 day
-        }
-
-        # 数据获取时间范围（所有级别都读取全部数据进行计算）
-        data_begin_time = None  # None表示读取全部可用数据
-
-        for lv_str in levels_to_process:
-            lv = KL_TYPE[lv_str]
-            plot_begin_time = level_start_times.get(lv_str)  # 每个级别使用不同的绘图时间范围
+    # 本地数据目录未变化（无新增/删除文件）时直接使用上次的名称缓存，无需登录BaoStock
+    names_signature = os.stat(offline_path).st_mtime_ns
+    stock_details = load_json_cache(STOCK_NAME_CACHE_PATH, names_signature)
+    if stock_details is None:
+        CBaoStock.do_init()
+        name_map = get_stock_name_map()
+        CBaoStock.do_close()
+        stock_details = {code: name_map.get(code, "N/A") for code in stock_codes}
+        if name_map:
+            save_json_cache(STOCK_NAME_CACHE_PATH, names_signature, stock_details)
+
+    # Load other configs (constant for the whole session)
+    end_time = config_data['end_time']
+    data_src = config_data['data_src']
+    # CChanConfig会消耗传入字典中的键，先保留一份原始配置用于缓存签名和子进程
+    chan_config_raw = dict(config_data['chan_config'])
+    chanconfig = CChanConfig(config_data['chan_config'])
+    plot_config = config_data['plot_config']
+    plot_para = config_data['plot_para']
+    levels_to_process = config_data['levels']
+
+    # Define levels and their corresponding start times
+    # 只在启动时计算一次，不随每次选择股票重复计算
+    now = datetime.now()
+    level_start_times = {
+        'K_MON': None,  # All data
+        'K_WEEK': (now - timedelta(days=3 * 365)).strftime('%Y-%m-%d'),  # Last 3 years
+        'K_DAY': (now - timedelta(days=365)).strftime('%Y-%m-%d'),  # Last 1 year
+        'K_60M': (now - timedelta(days=60)).strftime('%Y-%m-%d'),   # Last 60 days
+        'K_30M': (now - timedelta(days=30)).strftime('%Y-%m-%d'),   # Last 30 days
+        'K_15M': (now - timedelta(days=15)).strftime('%Y-%m-%d'),   # Last 15 days
+        'K_5M': (now - timedelta(days=5)).strftime('%Y-%m-%d'),    # Last 5 days
+        'K_1M': (now - timedelta(days=1)).strftime('%Y-%m-%d'),     # Last 1 day
+    }
+
+    # 数据获取时间范围（所有级别都读取全部数据进行计算）
+    data_begin_time = None  # None表示读取全部可用数据
+    # 只有本地离线数据才能根据文件mtime判断是否需要重新计算
+    use_chan_cache = 'OfflineDataAPI' in str(data_src)
+    # 与菜单顺序一致，用于确定预取的下一只股票
+    menu_codes = list(stock_details)
+    # 代码 -> 后台预取线程
+    prefetch_threads = {}
+
+    # 整个会话共用一个进程池，首次需要并行计算时才创建；使用spawn启动，避免在后台预取线程运行时fork进程
+    pool_workers = min(len(levels_to_process), os.cpu_count() or 1)
+    executor = None
+    try:
+        while True:
+            selected_code = display_menu(stock_details, "请选择要分析的股票:")
+
+            if not selected_code:
+                print("未选择股票，程序退出。")
+                break
+
+            code = selected_code
+            # 选中的股票仍在后台预取时等待其完成，避免重复计算
+            join_prefetch(prefetch_threads, code)
+
+            # 各级别数据与计算互不依赖：缺少缓存的级别先交给进程池并行计算，主进程再按级别顺序加载并绘图
+            cache_paths = {
+                lv_str: get_chan_cache_path(code, KL_TYPE[lv_str], chan_config_raw, end_time) if use_chan_cache else None
+                for lv_str in levels_to_process
+            }
+            missing_levels = [lv_str for lv_str, path in cache_paths.items() if path is not None and not os.path.exists(path)]
+            futures = {}
+            if len(missing_levels) > 1:
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=pool_workers, mp_context=multiprocessing.get_context('spawn'))
+                futures = {
+                    lv_str: executor.submit(build_chan_cache, code, lv_str, end_time, data_src, chan_config_raw, cache_paths[lv_str])
+                    for lv_str in missing_levels
+                }
+
+            for lv_str in levels_to_process:
+                lv = KL_TYPE[lv_str]
+                plot_begin_time = level_start_times.get(lv_str)  # 每个级别使用不同的绘图时间范围
             
-            print(f"\n正在处理 {code} 的 {lv.name} 数据...")
-
-            chan = CChan(
-                code=code,
-                begin_time=data_begin_time,  # None表示读取全部可用数据
-                end_time=end_time,
-                data_src=data_src,
-                lv_list=[lv],
-                config=chanconfig,
-                autype=AUTYPE.QFQ,
-            )
-
-            # 每次绘图前深拷贝 plot_para，避免跨股票的配置污染
-            plot_para_local = copy.deepcopy(plot_para)
-
-            # 设置绘图的时间范围（只影响显示，不影响计算）
-            if plot_begin_time is not None:
+                print(f"\n正在处理 {code} 的 {lv.name} 数据...")
+
+                chan_cache_path = cache_paths[lv_str]
+                if lv_str in futures:
+                    try:
+                        futures[lv_str].result()
+                    except Exception as e:
+                        print(f"并行计算 {code} 的 {lv.name} 失败，改为直接计算: {e}")
+                chan = load_chan_cache(chan_cache_path)
+                chan_from_cache = chan is not None
+                if not chan_from_cache:
+                    chan = CChan(
+                        code=code,
+                        begin_time=data_begin_time,  # None表示读取全部可用数据
+                        end_time=end_time,
+                        data_src=data_src,
+                        lv_list=[lv],
+                        config=chanconfig,
+                        autype=AUTYPE.QFQ,
+                    )
+
+                # 设置绘图的时间范围（只影响显示，不影响计算），plot_begin_time为None时显示所有数据
                 # 将plot_begin_time转换为PlotDriver支持的格式 "YYYY/MM/DD"
-                plot_begin_date = plot_begin_time.replace('-', '/')
-                
-                # 确保plot_para中有figure配置
-                if "figure" not in plot_para_local:
-                    plot_para_local["figure"] = {}
-                
-                # 更新plot_para中的figure配置，设置绘图开始日期
-                plot_para_local["figure"]["x_begin_date"] = plot_begin_date
-            else:
-                # 如果plot_begin_time为None，则显示所有数据，清除x_begin_date设置
-                if "figure" in plot_para_local and "x_begin_date" in plot_para_local["figure"]:
-                    del plot_para_local["figure"]["x_begin_date"]
-
-            plot_driver= CPlotDriver(
-                chan,
-                plot_config=plot_config,
-                plot_para=plot_para_local,
-            )
-            # Maximize the plot window
-            mng = plot_driver.figure.canvas.manager
-            mng.window.state('zoomed')
-            plot_driver.figure.show()
-
-            # 如果是日线级别，额外绘制：全历史日线缠论分析（不绘制K线与Demark，其余保持一致）
-            if lv == KL_TYPE.K_DAY:
-                plot_para_full = copy.deepcopy(plot_para)
-                # 移除绘图开始日期，显示全部数据
-                if "figure" in plot_para_full and "x_begin_date" in plot_para_full["figure"]:
-                    del plot_para_full["figure"]["x_begin_date"]
-
-                # 在原绘图配置基础上禁用K线与Demark
-                plot_config_full = copy.deepcopy(plot_config)
-                # 兼容未添加前缀的情况
-                for key in ("plot_kline", "kline"):
-                    plot_config_full[key] = False
-                for key in ("plot_demark", "demark"):
-                    plot_config_full[key] = False
-
-                plot_driver_full = CPlotDriver(
+                plot_begin_date = plot_begin_time.replace('-', '/') if plot_begin_time is not None else None
+                plot_para_local, plot_para_full = make_plot_paras(plot_para, plot_begin_date)
+
+                # 日线级别要画两张图，共用同一次遍历chan生成的绘图元数据
+                plot_metas = CPlotDriver.build_cache(chan) if lv == KL_TYPE.K_DAY else None
+                plot_driver= CPlotDriver(
                     chan,
-                    plot_config=plot_config_full,
-                    plot_para=plot_para_full,
+                    plot_config=plot_config,
+                    plot_para=plot_para_local,
+                    plot_metas=plot_metas,
                 )
-                mng_full = plot_driver_full.figure.canvas.manager
-                mng_full.window.state('zoomed')
-                plot_driver_full.figure.show()
-
-            # 打印统计信息对比
-            from Common.CTime import CTime
-            if plot_begin_time is not None:
-                year, month, day = map(int, plot_begin_time.split('-'))
-                plot_begin_time_obj = CTime(year, month, day, 0, 0)
-                plot_start_idx = 0
-                for i, klc in enumerate(chan[0].lst):
-                    if klc.time_begin >= plot_begin_time_obj:
-                        plot_start_idx = i
-                        break
-                
-                print(f"\n数据获取时间范围: 全部可用数据")
-                print(f"绘图显示时间范围: {plot_begin_time} 到最新")
-                print(f"总K线数量: {len(chan[0].lst)}")
-                print(f"显示K线数量: {len(chan[0].lst) - plot_start_idx}")
-            else:
-                print(f"\n数据获取时间范围: 全部可用数据")
-                print(f"绘图显示时间范围: 全部数据")
-                print(f"总K线数量: {len(chan[0].lst)}")
-                print(f"显示K线数量: {len(chan[0].lst)}")
-            
-            print(f"中枢数量: {len(chan[0].zs_list)}")
-            print(f"买卖点数量: {len(chan.get_bsp())}")
+                # Maximize the plot window
+                show_maximized(plot_driver.figure)
+
+                # 如果是日线级别，额外绘制：全历史日线缠论分析（不绘制K线与Demark，其余保持一致）
+                if lv == KL_TYPE.K_DAY:
+                    plot_driver_full = CPlotDriver(
+                        chan,
+                        plot_config=make_full_plot_config(plot_config),
+                        plot_para=plot_para_full,
+                        plot_metas=plot_metas,
+                    )
+                    show_maximized(plot_driver_full.figure)
+
+                # 打印统计信息对比
+                print_chan_summary(chan, "全部可用数据", plot_begin_time)
 
-            # 仅在日线/周线/月线级别输出最近一个中枢的顶和底价格
-            if lv in [KL_TYPE.K_DAY, KL_TYPE.K_WEEK, KL_TYPE.K_MON]:
-                if len(chan[0].zs_list) > 0:
-                    last_zs = chan[0].zs_list[-1]
+                # 仅在日线/周线/月线级别输出最近一个中枢的顶和底价格，没有该级别的中枢则不输出
+                if lv in [KL_TYPE.K_DAY, KL_TYPE.K_WEEK, KL_TYPE.K_MON]:
+                    print_last_zs(chan, lv.name.replace('K_', ''))
+
+                # 绘图与统计都已完成，最后再写缓存（写入会断开chan内部链接）
+                if chan_cache_path is not None and not chan_from_cache:
                     try:
-                        print(f"最近一个中枢（{lv.name.replace('K_', '')}）顶: {last_zs.high:.2f} 底: {last_zs.low:.2f}")
-                    except Exception:
-                        print(f"最近一个中枢（{lv.name.replace('K_', '')}）顶: {last_zs.high} 底: {last_zs.low}")
-                else:
-                    # 没有该级别的中枢则不输出
-                    pass
-
-        # 查看完一个股票后提示继续选择或退出
-        choice = input("输入 'q' 退出，或按回车继续选择其他股票: ")
-        if choice.lower() == 'q':
-            print("程序退出。")
-            break
+                        save_chan_cache(chan, chan_cache_path)
+                    except Exception as e:
+                        print(f"缓存 {code} 的 {lv.name} 计算结果失败: {e}")
+
+            # 用户查看图表期间，在后台线程中预先计算列表中的下一只股票
+            next_index = menu_codes.index(code) + 1
+            if use_chan_cache and next_index < len(menu_codes):
+                start_prefetch(prefetch_threads, menu_codes[next_index], prefetch_chan_cache,
+                               levels_to_process, end_time, data_src, chan_config_raw)
+
+            # 查看完一个股票后提示继续选择或退出
+            choice = input("输入 'q' 退出，或按回车继续选择其他股票: ")
+            if choice.lower() == 'q':
+                print("程序退出。")
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)